@@ -0,0 +1,44 @@
+"""
+Simulator throughput: EyeBallEnv.step/reset, single and vectorized.
+"""
+
+import numpy as np
+from common import measure
+from eyeball_env import EyeBallEnv
+from batched_env import BatchedEyeBallEnv
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+
+def _random_actions(n, rng):
+    # mostly "do nothing", like a trained agent
+    return np.where(rng.random(n) < 0.2, rng.integers(0, 4, n), 0)
+
+
+def run(quick=False):
+    n_calls = 2_000 if quick else 20_000
+    rng = np.random.default_rng(0)
+    results = {}
+
+    env = EyeBallEnv(headless=True)
+    env.reset(seed=0)
+
+    def step():
+        _, _, done, _, _ = env.step(int(_random_actions(1, rng)[0]))
+        if done:
+            env.reset()
+
+    results["env.step"] = dict(measure(step, n_calls), unit="steps/s")
+    results["env.reset"] = dict(measure(env.reset, n_calls // 10), unit="resets/s")
+
+    for name, n_envs, vec_env in [
+        ("dummy_vec_env.step[4]", 4, DummyVecEnv([lambda: EyeBallEnv(headless=True) for _ in range(4)])),
+        ("batched_env.step[256]", 256, BatchedEyeBallEnv(n_envs=256)),
+    ]:
+        vec_env.seed(0)
+        vec_env.reset()
+        results[name] = dict(
+            measure(lambda: vec_env.step(_random_actions(n_envs, rng)), n_calls // 4, items_per_call=n_envs),
+            unit="env steps/s")
+        vec_env.close()
+
+    return results
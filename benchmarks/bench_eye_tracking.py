@@ -0,0 +1,244 @@
+"""
+Per-frame landmark analysis cost of EyeTracker._analyze_eye_position on synthetic landmarks,
+and the tracker's processing loop replaying them through a LandmarkSource (no camera, no FaceMesh).
+
+Run directly to compare the raw and the smoothed direction logic (see eye_tracking/gaze_filter.py)
+for lane switch latency and false switches:
+
+    python benchmarks/bench_eye_tracking.py                       # synthetic saccades
+    python benchmarks/bench_eye_tracking.py --landmarks rec.npz   # a recording from frame_sources.py
+"""
+
+import argparse
+import numpy as np
+from common import measure
+
+
+N_LANDMARKS = 478  # FaceMesh with refine_landmarks=True
+
+
+class _Landmark:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+
+class _FaceLandmarks:
+    """Same shape as a FaceMesh result entry: .landmark[i].x/.y/.z"""
+
+    def __init__(self, landmark):
+        self.landmark = landmark
+
+
+def synthetic_landmarks(n_frames=600, seed=0, fps=30):
+    """
+    (times, landmarks) in the LandmarkSource format: eye corners fixed and the irises
+    sweeping left/center/right, plus a little per-frame jitter like a real tracker.
+    """
+    rng = np.random.default_rng(seed)
+    gaze = 0.5 + 0.3 * np.sin(np.linspace(0, 6 * np.pi, n_frames))
+    eyes = {33: 0.40, 133: 0.46, 362: 0.54, 263: 0.60}  # outer/inner corner x of both eyes
+
+    landmarks = np.zeros((n_frames, N_LANDMARKS, 3), dtype=np.float32)
+    landmarks[:, :, :2] = rng.random((n_frames, N_LANDMARKS, 2)) * 0.2 + 0.4
+    for idx, x in eyes.items():
+        landmarks[:, idx, 0] = x
+    landmarks[:, 468, 0] = eyes[33] + (eyes[133] - eyes[33]) * gaze + rng.normal(0, 0.002, n_frames)
+    landmarks[:, 473, 0] = eyes[362] + (eyes[263] - eyes[362]) * gaze + rng.normal(0, 0.002, n_frames)
+    return np.arange(n_frames) / fps, landmarks
+
+
+def synthetic_saccades(seconds=120.0, fps=30, seed=0, noise=0.002, glitch_rate=0.01):
+    """
+    (times, landmarks, truth): the gaze resting on left/center/right for 0.6-2 s at a time with
+    ~50 ms saccades in between, iris jitter of `noise` and glitch_rate frames with a much larger
+    error (blinks, bad fits). truth is the intended direction per frame, switching at each saccade.
+    """
+    rng = np.random.default_rng(seed)
+    n_frames = int(seconds * fps)
+    times = np.arange(n_frames) / fps
+    targets = {"left": 0.25, "center": 0.5, "right": 0.75}  # gaze ratio, as EyeTracker computes it
+
+    truth = np.empty(n_frames, dtype=object)
+    ratio = np.empty(n_frames)
+    direction, start, previous = "center", 0, 0.5
+    while start < n_frames:
+        end = min(n_frames, start + int(rng.uniform(0.6, 2.0) * fps))
+        ramp = np.clip((times[start:end] - times[start]) / 0.05, 0, 1)
+        truth[start:end] = direction
+        ratio[start:end] = previous + (targets[direction] - previous) * ramp
+        previous = targets[direction]
+        direction = rng.choice([d for d in targets if d != direction])
+        start = end
+    ratio += np.cumsum(rng.normal(0, 0.002, n_frames)) * 0.1  # slow fixational drift
+
+    eyes = {33: 0.40, 133: 0.46, 362: 0.54, 263: 0.60}
+    jitter = rng.normal(0, noise, (n_frames, 2))
+    glitches = rng.random(n_frames) < glitch_rate
+    jitter[glitches] += rng.normal(0, 5 * noise, (glitches.sum(), 2))
+
+    landmarks = np.zeros((n_frames, N_LANDMARKS, 3), dtype=np.float32)
+    landmarks[:, :, :2] = rng.random((n_frames, N_LANDMARKS, 2)) * 0.2 + 0.4
+    for idx, x in eyes.items():
+        landmarks[:, idx, 0] = x
+    iris = 1 - ratio  # EyeTracker mirrors the ratio
+    landmarks[:, 468, 0] = eyes[33] + (eyes[133] - eyes[33]) * iris + jitter[:, 0]
+    landmarks[:, 473, 0] = eyes[362] + (eyes[263] - eyes[362]) * iris + jitter[:, 1]
+    return times, landmarks, truth
+
+
+def classify_trace(tracker, times, landmarks):
+    """Run the tracker's analysis over a recorded trace; (directions, raw gaze ratios) per frame"""
+    from eye_tracking.frame_sources import RecordedLandmarks
+    directions = np.empty(len(times), dtype=object)
+    ratios = np.full(len(times), np.nan)
+    for idx, (t, frame) in enumerate(zip(times, landmarks)):
+        if not np.isnan(frame[0, 0]):
+            tracker._analyze_eye_position(RecordedLandmarks(frame), t)
+            ratios[idx] = tracker.raw_gaze_ratio
+        directions[idx] = tracker.look_direction
+    return directions, ratios
+
+
+def reference_directions(times, ratios, window=0.2, min_dwell=0.25):
+    """
+    Ground truth for a real recording: the raw ratio median filtered over a centered window
+    (which no live filter can do), thresholded at 0.4/0.6, ignoring stays shorter than min_dwell.
+    """
+    valid = ~np.isnan(ratios)
+    ratios = np.interp(times, times[valid], ratios[valid])
+    half = window / 2
+    lo = np.searchsorted(times, times - half)
+    hi = np.searchsorted(times, times + half, side="right")
+    smooth = np.array([np.median(ratios[a:b]) for a, b in zip(lo, hi)])
+    labels = np.where(smooth < 0.4, "left", np.where(smooth > 0.6, "right", "center")).astype(object)
+
+    # merge stays shorter than min_dwell into the one before them
+    start = 0
+    for idx in range(1, len(labels) + 1):
+        if idx == len(labels) or labels[idx] != labels[start]:
+            if start > 0 and times[idx - 1] - times[start] < min_dwell:
+                labels[start:idx] = labels[start - 1]
+            start = idx
+    return labels
+
+
+def switching_stats(times, directions, truth):
+    """
+    Latency from each true direction change to the tracker reporting it, and false lane switches.
+    Every change of the tracker's direction to left/right is a lane switch in the game; it is false
+    when the truth is a different direction, or when the truth has not changed since the last one
+    (the direction flickered through center and re-triggered).
+    """
+    latencies, missed = [], 0
+    changes = np.flatnonzero(truth[1:] != truth[:-1]) + 1
+    for idx, change in enumerate(changes):
+        end = changes[idx + 1] if idx + 1 < len(changes) else len(times)
+        hits = np.flatnonzero(directions[change:end] == truth[change])
+        if len(hits):
+            latencies.append(times[change + hits[0]] - times[change])
+        else:
+            missed += 1
+
+    segment = np.cumsum(np.r_[0, truth[1:] != truth[:-1]])  # index of the truth stay per frame
+    entries = np.flatnonzero(directions[1:] != directions[:-1]) + 1
+    lane_switches = [idx for idx in entries if directions[idx] != "center"]
+    false_switches, switched_in = 0, set()
+    for idx in lane_switches:
+        if directions[idx] != truth[idx] or segment[idx] in switched_in:
+            false_switches += 1
+        switched_in.add(segment[idx])
+
+    minutes = (times[-1] - times[0]) / 60
+    latencies = np.array(latencies) * 1000
+    return {
+        "changes": len(changes),
+        "latency_p50_ms": float(np.median(latencies)) if len(latencies) else float("nan"),
+        "latency_p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else float("nan"),
+        "missed": missed,
+        "lane_switches": len(lane_switches),
+        "false_switches_per_min": false_switches / minutes,
+    }
+
+
+def compare_switching(times, landmarks, truth=None):
+    """Print the raw (old) and smoothed direction logic side by side"""
+    from eye_tracking.eye_tracker import EyeTracker
+    variants = {
+        "raw, 0.5 s cooldown": EyeTracker(smoothing=False),
+        "raw, 0.1 s cooldown": EyeTracker(smoothing=False, direction_cooldown=0.1),
+        "smoothed, 0.1 s cooldown": EyeTracker(),
+    }
+    outputs = {name: classify_trace(tracker, times, landmarks) for name, tracker in variants.items()}
+    if truth is None:
+        truth = reference_directions(times, next(iter(outputs.values()))[1])
+
+    print(f"{'direction logic':<28}{'changes':>8}{'p50 ms':>8}{'p95 ms':>8}{'missed':>8}{'lane sw':>8}"
+          f"{'false/min':>10}")
+    for name, (directions, _) in outputs.items():
+        stats = switching_stats(times, directions, truth)
+        print(f"{name:<28}{stats['changes']:>8}{stats['latency_p50_ms']:8.0f}{stats['latency_p95_ms']:8.0f}"
+              f"{stats['missed']:>8}{stats['lane_switches']:>8}{stats['false_switches_per_min']:10.1f}")
+
+
+def synthetic_faces(n_frames=600, seed=0):
+    """synthetic_landmarks as FaceMesh-like result objects"""
+    _, landmarks = synthetic_landmarks(n_frames, seed)
+    return [_FaceLandmarks([_Landmark(x, y, z) for x, y, z in frame.tolist()]) for frame in landmarks]
+
+
+def run(quick=False):
+    try:
+        from eye_tracking.eye_tracker import EyeTracker
+    except ImportError as e:
+        print(f"Skipping eye tracking benchmark: {e}")
+        return {}
+
+    # analysis only, no FaceMesh or camera (FaceMesh is only created by start())
+    faces = synthetic_faces()
+    n_calls = 5_000 if quick else 50_000
+    results = {}
+    for name, smoothing in (("eye_tracker.analyze_eye_position", True),
+                            ("eye_tracker.analyze_eye_position[raw]", False)):
+        tracker = EyeTracker(smoothing=smoothing)
+        frame = [0]
+
+        def analyze():
+            tracker._analyze_eye_position(faces[frame[0] % len(faces)], frame[0] / 30)
+            frame[0] += 1
+
+        results[name] = dict(measure(analyze, n_calls), unit="frames/s")
+
+    # the whole processing loop, replaying recorded landmarks as fast as possible
+    from eye_tracking.frame_sources import LandmarkSource
+    times, landmarks = synthetic_landmarks()
+    replayer = EyeTracker(max_fps=None)
+
+    def replay():
+        replayer.source = LandmarkSource(times=times, landmarks=landmarks, realtime=False)
+        replayer.running = True
+        replayer._process_video()
+
+    results["eye_tracker.replay_landmarks"] = dict(measure(replay, 5 if quick else 50, warmup=1,
+                                                           items_per_call=len(times)), unit="frames/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the eye tracker's direction logic on a landmark trace")
+    parser.add_argument("--landmarks", help="recorded .npz from frame_sources.py, synthetic saccades if omitted")
+    parser.add_argument("--seconds", type=float, default=120.0, help="length of the synthetic trace")
+    parser.add_argument("--noise", type=float, default=0.002, help="iris jitter of the synthetic trace")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.landmarks:
+        data = np.load(args.landmarks)
+        compare_switching(data["times"], data["landmarks"])
+    else:
+        compare_switching(*synthetic_saccades(args.seconds, noise=args.noise, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+In-game policy inference: AIController.process_action per-call latency, and
+AITeam.decide for several racers sharing one batched forward pass.
+"""
+
+import numpy as np
+from pathlib import Path
+from common import measure, src_dir
+from rl.ai_controller import AIController
+from rl.ai_team import AITeam
+
+
+rl_dir = str(Path(src_dir) / "rl")
+model_path = f"{rl_dir}/models/best/best_model"
+stats_path = f"{rl_dir}/models/vec_normalize.pkl"
+policy_path = f"{rl_dir}/models/best/best_policy.npz"
+
+lanes = [-2, 0, 2]
+base_speed = 5
+level_speed = {1: 1.0, 2: 1.2, 3: 1.4, 4: 1.6, 5: 1.8}
+
+
+class _Player:
+    """Stand-in for the Ursina Player, only what the controller touches"""
+
+    def __init__(self):
+        self.lane_index = 1
+        self.x, self.y, self.z = 0.0, 0.0, 0.0
+        self.y_velocity = 0
+
+    def switch_lane(self, target_index, duration=0.2):
+        self.lane_index = target_index
+        self.x = lanes[target_index]
+
+
+class _Obstacle:
+    def __init__(self, x, z, height):
+        self.x, self.y, self.z = x, 0.0, z
+        self.position = (x, 0.0, z)
+        self.scale = (1.5, height, 0.5)
+
+
+def _obstacles(rng, n_rows=12):
+    obstacles = []
+    z = 40.0
+    for _ in range(n_rows):
+        for lane in lanes:
+            if rng.random() < 0.5:
+                obstacles.append(_Obstacle(lane, z, 1.0))
+        z += 5 + rng.integers(0, 6)
+    return obstacles
+
+
+def run(quick=False):
+    n_calls = 1_000 if quick else 10_000
+    rng = np.random.default_rng(0)
+    obstacles = _obstacles(rng)
+    results = {}
+
+    missing = f"{rl_dir}/models/missing"
+    for name, stats, normalizer, policy, cache_step in [
+            ("ai.process_action[vec_normalize]", stats_path, missing, missing, None),
+            ("ai.process_action[raw]", missing, missing, missing, None),
+            ("ai.process_action[numpy,vec_normalize]", stats_path, missing, policy_path, None),
+            ("ai.process_action[numpy,exported_stats]", stats_path, None, policy_path, None),
+            ("ai.process_action[numpy,exported_stats,cache]", stats_path, None, policy_path, 0.25)]:
+        controller = AIController(rl_dir, model_path, stats, policy_path=policy, normalizer_path=normalizer,
+                                  action_cache_step=cache_step)
+        if controller.ai_model is None:
+            continue
+        player = _Player()
+
+        def decide():
+            controller.ai_action_cooldown = 0  # force a decision every call
+            player.z = (player.z + 0.5) % 40
+            controller.process_action(0.016, player, obstacles, lanes, base_speed, level_speed, 1)
+
+        results[name] = dict(measure(decide, n_calls), unit="decisions/s")
+
+    # per racer decision throughput, should grow with the number of racers
+    opponent = {"model_path": model_path, "stats_path": stats_path, "policy_path": policy_path}
+    for n_racers in (1, 4, 16):
+        players = [_Player() for _ in range(n_racers)]
+        team = AITeam(rl_dir, [opponent] * n_racers, players, lanes)
+        if not team.load():
+            continue
+
+        def decide_all():
+            for racer in team.racers:
+                racer.cooldown = 0  # every racer decides every call
+                racer.player.z = (racer.player.z + 0.5) % 40
+            team.decide(0.016, obstacles, base_speed, level_speed, 1)
+
+        results[f"ai_team.decide[{n_racers}]"] = dict(measure(decide_all, n_calls, items_per_call=n_racers),
+                                                      unit="racer decisions/s")
+
+    return results
@@ -0,0 +1,43 @@
+"""
+Timing helpers shared by the benchmarks.
+"""
+
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+
+src_dir = str(Path(__file__).parent.parent.absolute() / "src")
+rl_dir = str(Path(src_dir) / "rl")
+for path in (src_dir, rl_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def measure(fn, n_calls, warmup=50, items_per_call=1):
+    """
+    Call fn() n_calls times and summarize per-call latency.
+    Throughput is items per second, where one call processes items_per_call items
+    (e.g. one vectorized step over N envs is N env steps).
+    """
+    for _ in range(warmup):
+        fn()
+
+    latencies = np.empty(n_calls)
+    clock = time.perf_counter
+    start = clock()
+    for i in range(n_calls):
+        t0 = clock()
+        fn()
+        latencies[i] = clock() - t0
+    total = clock() - start
+
+    return {
+        "n": n_calls,
+        "throughput": n_calls * items_per_call / total,
+        "mean_us": float(latencies.mean() * 1e6),
+        "p50_us": float(np.percentile(latencies, 50) * 1e6),
+        "p90_us": float(np.percentile(latencies, 90) * 1e6),
+        "p99_us": float(np.percentile(latencies, 99) * 1e6),
+    }
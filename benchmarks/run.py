@@ -0,0 +1,112 @@
+"""
+Run the hot path benchmarks and compare them with a stored baseline.
+
+    python benchmarks/run.py                    # run everything, compare with baseline.json
+    python benchmarks/run.py --only env --quick
+    python benchmarks/run.py --save-baseline    # store this run as the new baseline
+
+Exits with status 1 if any benchmark's throughput dropped by more than --tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+import common  # sets up sys.path for the game sources
+
+
+bench_dir = Path(__file__).parent.absolute()
+SUITES = {
+    "env": "bench_env",
+    "inference": "bench_inference",
+    "eye": "bench_eye_tracking",
+}
+
+
+def run_suites(names, quick):
+    results = {}
+    for name in names:
+        module = __import__(SUITES[name])
+        print(f"Running {name} benchmarks...")
+        results.update(module.run(quick=quick))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table and return the names of regressed benchmarks"""
+    regressions = []
+    print(f"\n{'benchmark':<48} {'throughput':>14} {'baseline':>14} {'change':>8} {'p50 us':>9} {'p99 us':>9}")
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base:
+            change = stats["throughput"] / base["throughput"] - 1
+            base_text, change_text = f"{base['throughput']:14.1f}", f"{change:+8.1%}"
+            if change < -tolerance:
+                regressions.append(name)
+                change_text += " !"
+        else:
+            base_text, change_text = f"{'-':>14}", f"{'':>8}"
+        print(f"{name:<48} {stats['throughput']:14.1f} {base_text} {change_text} "
+              f"{stats['p50_us']:9.1f} {stats['p99_us']:9.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EyeBall hot path benchmarks")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma separated subset of {list(SUITES)}")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke run")
+    parser.add_argument("--output", default=str(bench_dir / "results.json"), help="where to write this run")
+    parser.add_argument("--baseline", default=str(bench_dir / "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative throughput drop")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(names) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown benchmark suites: {sorted(unknown)}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "quick": args.quick,
+        },
+        "results": run_suites(names, args.quick),
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists():
+        with open(baseline_path) as f:
+            baseline = json.load(f)["results"]
+    else:
+        print(f"No baseline at {baseline_path}, run with --save-baseline to create one.")
+
+    regressions = compare(report["results"], baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,20 @@
-from eye_tracking.eye_tracker import EyeTracker  # have to be imported before ursina...
+from time import perf_counter
+startup_started = perf_counter()
+import mediapipe  # noqa: F401, has to be imported before ursina...
+from eye_tracking.eye_tracker import EyeTracker
+from eye_tracking.tracker_process import ProcessEyeTracker
 from ursina import Ursina, camera, time, held_keys, destroy, scene, Text, color
 from player import Player
 from level import LevelManager
 from ui import UIManager
 from game_env import GameEnv
 from game_controller import GameController
-from rl.ai_controller import AIController
+from rl.ai_team import AITeam
+from startup import StartupOrchestrator
+from instrumentation import instruments
+from datetime import datetime
+import atexit
+import os
 import sys
 from pathlib import Path
 
@@ -14,6 +23,24 @@ from pathlib import Path
 rl_dir = str(Path(__file__).parent.absolute() / "RL")
 model_path = f"{rl_dir}/models/best/best_model"
 stats_path = f"{rl_dir}/models/vec_normalize.pkl"
+policy_path = f"{rl_dir}/models/best/best_policy.npz"  # torch-free export of model_path
+ai_async_decisions = True  # run AI inference off the game thread
+ai_action_cache_step = None  # e.g. 0.25 to reuse decisions for near-identical observations, see rl/action_cache.py
+
+# AI opponents, one entry per racer; racers playing the same model share one batched forward pass per frame
+ai_opponents = [
+    {"name": "AI", "model_path": model_path, "stats_path": stats_path, "policy_path": policy_path},
+]
+ai_colors = [color.red, color.orange, color.magenta, color.cyan, color.yellow]
+
+# eye tracker: run FaceMesh on a region around the face once it is found
+eye_tracker_roi_mode = True
+eye_tracker_process = False  # run capture and FaceMesh in a worker process, off the game's GIL
+
+# frame time instrumentation, F3 toggles it together with the overlay, dumped to metrics_dir at exit
+instrumentation_enabled = False
+metrics_dir = str(Path(__file__).parent.absolute() / "metrics")
+overlay_refresh_interval = 0.5
 
 # Game configuration
 lanes = [-2, 0, 2]
@@ -30,21 +57,25 @@ obstacle_min_spacing = 5
 # Game state
 use_eye_tracking = True
 controls_text_shown = False
+eye_tracker = None  # set once the tracker is started in the background
+first_frame = True
+overlay_refresh_in = 0
 
 
 def check_collisions():
-    global ai_active
     for obstacle in game_controller.obstacles[:]:
         if player.intersects(obstacle).hit:
             game_controller.game_active = False
             game_over_text = Text(text=f"Game Over! Your Score: {int(game_controller.score)}",
                                   origin=(0, 0), scale=1.5, parent=camera.ui)
 
-        if ai_active and ai_player.intersects(obstacle).hit:
-            ai_game_over_text = Text(text=f"AI crashed! AI Score: {int(game_controller.ai_score)}",
-                                     position=(0.3, -0.4), scale=1.5, color=color.red, parent=camera.ui)
-            ai_active = False
-            print("AI crashed!")
+        for idx, racer in enumerate(ai_team.racers):
+            if racer.active and racer.player.intersects(obstacle).hit:
+                ai_game_over_text = Text(text=f"{racer.name} crashed! AI Score: {int(racer.score)}",
+                                         position=(0.3, -0.4 + 0.05 * idx), scale=1.5,
+                                         color=racer.player.color, parent=camera.ui)
+                racer.active = False
+                print(f"{racer.name} crashed!")
 
         # clean up obstacles behind player
         min_z = player.z - 10
@@ -55,15 +86,15 @@ def check_collisions():
 
 def reset_game():
     """Reset the game state to start a new game"""
-    global ai_active, controls_text_shown
+    global controls_text_shown
 
-    game_controller.reset_game(player, ai_player)
-    ai_active = True
+    game_controller.reset_game(player, [racer.player for racer in ai_team.racers])
+    ai_team.reset()
 
     for entity in scene.entities:
         if isinstance(entity, Text):
             if ("Game Over" in getattr(entity, 'text', '') or
-                "AI crashed" in getattr(entity, 'text', '') or
+                " crashed! AI Score" in getattr(entity, 'text', '') or
                     "Controls:" in getattr(entity, 'text', '')):
                 destroy(entity, delay=2)
 
@@ -76,7 +107,7 @@ def reset_game():
     
     ai_indicator_exists = False
     for entity in scene.entities:
-        if isinstance(entity, Text) and "AI Agent Running" in getattr(entity, 'text', ''):
+        if entity is ai_text or (isinstance(entity, Text) and "AI Agent Running" in getattr(entity, 'text', '')):
             ai_indicator_exists = True
             break
 
@@ -92,10 +123,20 @@ def reset_game():
 
 def update():
     """Main game loop"""
-    global use_eye_tracking, ai_active, controls_text_shown
+    global use_eye_tracking, controls_text_shown, first_frame
+
+    # swap in components that finished loading in the background
+    startup.poll()
+    if first_frame:
+        startup.mark("playable", startup_started)
+        first_frame = False
+
+    instruments.observe("frame.dt", time.dt * 1000)
+    update_overlay()
 
     if held_keys['escape']:
         print("Exiting game...")
+        ai_team.close()
         app.destroy()
         sys.exit()
 
@@ -110,7 +151,7 @@ def update():
             return
 
         if not controls_text_shown:
-            Text(text="Controls:\nR: Restart\nE: Toggle Eye Tracking\nEscape: Exit",
+            Text(text="Controls:\nR: Restart\nE: Toggle Eye Tracking\nF3: Frame Times\nEscape: Exit",
                  position=(-0.5, 0.2),
                  scale=1,
                  color=color.white,
@@ -127,36 +168,77 @@ def update():
         time.sleep(0.2)
         game_controller.lane_switch_cooldown = 0.3
 
-    # update player
-    current_speed = base_speed * level_speed[level_manager.current_level]
-    player.update_position(time.dt, current_speed, ball_radius)
-
-    if ai_active:
-        ai_player.update_position(time.dt, current_speed, ball_radius)
-        game_controller.ai_score += time.dt
-        ai_action = ai_controller.process_action(time.dt, ai_player, game_controller.obstacles,
-                                                 lanes, base_speed, level_speed, level_manager.current_level)
-        game_controller.handle_ai_jumping(ai_player, ai_action)
-    elif not ai_active and ai_player.z < player.z:
-        ai_player.update_position(time.dt, current_speed, ball_radius)
-
-    camera.position = (player.x, player.y + 5, player.z - 10)
-
-    # player movements
-    game_controller.handle_lane_movement(
-        player, eye_tracker, use_eye_tracking, held_keys)
-    game_controller.handle_jumping(player, held_keys['space'])
-
-    # game state
-    game_controller.score += time.dt
-    level_manager.check_progression(player.z, camera.ui)
-    game_controller.ensure_obstacles_ahead(player, level_manager)
-    check_collisions()
-
-    # UI
-    ui_manager.update(level_manager.current_level,
-                      level_speed[level_manager.current_level],
-                      game_controller.score, game_controller.ai_score)
+    with instruments.timer("frame.update"):
+        # update player
+        with instruments.timer("frame.movement"):
+            current_speed = base_speed * level_speed[level_manager.current_level]
+            player.update_position(time.dt, current_speed, ball_radius)
+
+            for racer in ai_team.racers:
+                if racer.active:
+                    racer.player.update_position(time.dt, current_speed, ball_radius)
+                    racer.score += time.dt
+                elif racer.player.z < player.z:
+                    racer.player.update_position(time.dt, current_speed, ball_radius)
+
+        # one batched decision per distinct model for all racers
+        with instruments.timer("frame.ai"):
+            ai_actions = ai_team.decide(time.dt, game_controller.obstacles, base_speed, level_speed,
+                                        level_manager.current_level)
+            for racer, ai_action in zip(ai_team.racers, ai_actions):
+                if racer.active:
+                    game_controller.handle_ai_jumping(racer.player, ai_action)
+            game_controller.ai_score = max((racer.score for racer in ai_team.racers), default=0)
+
+        # player movements
+        with instruments.timer("frame.player_input"):
+            camera.position = (player.x, player.y + 5, player.z - 10)
+            game_controller.handle_lane_movement(
+                player, eye_tracker, use_eye_tracking and eye_tracker is not None, held_keys)
+            game_controller.handle_jumping(player, held_keys['space'])
+
+        # game state
+        game_controller.score += time.dt
+        with instruments.timer("frame.spawning"):
+            level_manager.check_progression(player.z, camera.ui)
+            game_controller.ensure_obstacles_ahead(player, level_manager)
+        with instruments.timer("frame.collisions"):
+            check_collisions()
+
+        # UI
+        with instruments.timer("frame.ui"):
+            ui_manager.update(level_manager.current_level,
+                              level_speed[level_manager.current_level],
+                              game_controller.score, game_controller.ai_score)
+
+
+def input(key):
+    """Ursina key events"""
+    if key == 'f3':
+        instruments.enabled = not instruments.enabled
+        metrics_text.enabled = instruments.enabled
+        update_overlay(force=True)
+
+
+def update_overlay(force=False):
+    """Refresh the frame time overlay a few times per second, rebuilding Text every frame is costly"""
+    global overlay_refresh_in
+    if not instruments.enabled:
+        return
+    overlay_refresh_in -= time.dt
+    if overlay_refresh_in <= 0 or force:
+        overlay_refresh_in = overlay_refresh_interval
+        metrics_text.text = instruments.report()
+
+
+def dump_metrics():
+    if not instruments.histograms:
+        return
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = f"{metrics_dir}/frame_metrics_{datetime.now():%Y%m%d_%H%M%S}"
+    instruments.dump(f"{path}.csv")
+    instruments.dump(f"{path}.json")
+    print(f"Frame metrics written to {path}.csv/.json")
 
 app = Ursina(
     title="EyeBall Game",
@@ -166,27 +248,61 @@ app = Ursina(
     development_mode=True
 )
 
-try:
-    eye_tracker = EyeTracker()
-    eye_tracker.start()
+
+def start_eye_tracker():
+    if eye_tracker_process:
+        tracker = ProcessEyeTracker(roi_mode=eye_tracker_roi_mode)
+    else:
+        tracker = EyeTracker(roi_mode=eye_tracker_roi_mode)
+    tracker.start()
+    return tracker
+
+
+def on_eye_tracker_ready(tracker):
+    global eye_tracker
+    eye_tracker = tracker
+    tracker_text.text = "Eye tracker ready"
+    tracker_text.color = color.green
+    destroy(tracker_text, delay=2)
     print("Eye tracker initialized successfully")
-except Exception as e:
-    print(f"Error initializing EyeTracker: {e}")
+
+
+def on_eye_tracker_failed(error):
+    global use_eye_tracking
     use_eye_tracking = False
+    tracker_text.text = "Eye tracker unavailable, use the arrow keys"
+    destroy(tracker_text, delay=4)
+    print(f"Error initializing EyeTracker: {error}")
+
+
+def on_ai_loaded(loaded):
+    ai_text.text = "AI Agent Running" if loaded else "AI unavailable"
+
+
+# slow components load in the background while the scene is built
+startup = StartupOrchestrator(startup_started)
+ai_players = [Player(lanes, color=ai_colors[idx % len(ai_colors)]) for idx in range(len(ai_opponents))]
+ai_team = AITeam(rl_dir, ai_opponents, ai_players, lanes, async_decisions=ai_async_decisions,
+                 action_cache_step=ai_action_cache_step)
+startup.submit("ai", ai_team.load, on_ready=on_ai_loaded)
+startup.submit("eye_tracker", start_eye_tracker, on_ready=on_eye_tracker_ready, on_error=on_eye_tracker_failed)
 
 # Init game objects
+scene_started = perf_counter()
 game_env = GameEnv()
 player = Player(lanes, color=color.white)
-ai_player = Player(lanes, color=color.red)
 game_controller = GameController(lanes, base_speed, gravity, ball_radius, obstacle_min_spacing)
-ai_controller = AIController(rl_dir, model_path, stats_path)
-ai_active = True
 
-ai_text = Text(text="AI Agent Running",
+ai_text = Text(text="AI loading...",
                position=(-0.7, -0.4),
                scale=1,
                color=color.red,
                parent=camera.ui)
+tracker_text = Text(text="Eye tracker warming up...",
+                    position=(-0.7, -0.35),
+                    scale=1,
+                    color=color.yellow,
+                    parent=camera.ui)
 
 camera.position = (0, 5, -10)
 camera.rotation_x = 20
@@ -194,5 +310,11 @@ camera.rotation_x = 20
 level_manager = LevelManager(level_length, max_level, level_speed)
 ui_manager = UIManager(camera.ui)
 
+instruments.enabled = instrumentation_enabled
+metrics_text = Text(text="", position=(0.35, 0.45), scale=0.7, font='VeraMono.ttf',
+                    enabled=instrumentation_enabled, parent=camera.ui)
+atexit.register(dump_metrics)
+startup.mark("scene", scene_started)
+
 if __name__ == '__main__':
-    app.run()
\ No newline at end of file
+    app.run()
@@ -1,20 +1,46 @@
-import mediapipe as mp
-import cv2
 import threading
 import time
 import atexit
+from eye_tracking.frame_sources import CameraSource
+from eye_tracking.gaze_filter import DirectionClassifier, OneEuroFilter
+from eye_tracking.governor import FrameRateGovernor
+from eye_tracking.latency import LatencyTrace
+from instrumentation import instruments
+
+# imported by start() once a source needs FaceMesh, so recorded landmarks replay without OpenCV and mediapipe
+cv2 = None
 
 class EyeTracker:
     _instance = []
+
+    # face oval extremes (right cheek, left cheek, forehead, chin) to locate the face for the ROI
+    FACE_BOUNDS = [234, 454, 10, 152]
+
+    # without smoothing the raw ratio needs the long cooldown to not flicker between directions
+    SMOOTHED_COOLDOWN = 0.1
+    RAW_COOLDOWN = 0.5
+
+    # size the eye regions are shrunk to for the motion gate (width, height)
+    MOTION_SIZE = (16, 8)
     
-    def __init__(self):
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, roi_mode=False, roi_margin=0.4, roi_max_size=320, max_fps=15, boost_fps=30,
+                 smoothing=True, direction_cooldown=None, motion_gate=True, motion_threshold=6.0,
+                 max_skipped_frames=4):
+        """
+        roi_mode: once a face is found, run FaceMesh only on a region around it
+            (re-acquiring on the full frame when the face is lost)
+        roi_margin: space around the face in the region, as a fraction of the face size
+        roi_max_size: regions larger than this (pixels, longest side) are downscaled before FaceMesh
+        max_fps: frames processed per second while the gaze is steady, None processes every frame
+        boost_fps: processing rate for a moment after the gaze moved (see governor.py)
+        smoothing: One-Euro filter the gaze ratio and add hysteresis to the thresholds (see gaze_filter.py)
+        direction_cooldown: seconds between direction changes, by default shorter with smoothing
+        motion_gate: skip FaceMesh and reuse the last landmarks while the eyes look the same
+        motion_threshold: mean absolute gray level difference (0-255) of the shrunk eye regions
+            to the last frame FaceMesh ran on, below which a frame is skipped
+        max_skipped_frames: FaceMesh runs at least once every max_skipped_frames + 1 frames
+        """
+        self.face_mesh = None  # created by start() unless the source already gives landmarks
 
         EyeTracker._instance.append(self)
         atexit.register(self.stop)
@@ -22,85 +48,266 @@ class EyeTracker:
         # rough eye landmark
         self.LEFT_EYE = [33, 133]
         self.RIGHT_EYE = [362, 263]
+        # per eye: the two corners, then the iris (468 is LEFT_IRIS, 473 is RIGHT_IRIS)
+        self.gaze_landmarks = self.LEFT_EYE + [468] + self.RIGHT_EYE + [473]
         
-        self.cap = None
+        self.source = None
         self.running = False
         self.thread = None
         
         self.look_direction = "center"  # "left", "center", "right"
-        self.last_direction_change = time.time()
-        self.direction_cooldown = 0.5  # seconds
+        if direction_cooldown is None:
+            direction_cooldown = self.SMOOTHED_COOLDOWN if smoothing else self.RAW_COOLDOWN
+        self.gaze_filter = OneEuroFilter() if smoothing else None
+        self.classifier = DirectionClassifier(hysteresis=0.05 if smoothing else 0.0, cooldown=direction_cooldown)
+
+        self.roi_mode = roi_mode
+        self.roi_margin = roi_margin
+        self.roi_max_size = roi_max_size
+        self.roi = None  # (x0, y0, x1, y1) in frame pixels, None searches the full frame
+        self.region = None  # the region of the frame the last processed image came from
+        self.frames_processed = 0
+        self.frames_full = 0
+        self.frames_roi = 0
+
+        self.motion_gate = motion_gate
+        self.motion_threshold = motion_threshold
+        self.max_skipped_frames = max_skipped_frames
+        self.last_landmarks = None  # the last FaceMesh result, reused for skipped frames
+        self.eye_boxes = None  # (x0, y0, x1, y1) of both eyes in frame pixels, from last_landmarks
+        self.eye_reference = None  # the shrunk eye regions of the frame last_landmarks came from
+        self.skipped_in_row = 0
+        self.frames_skipped = 0
+
+        self.governor = FrameRateGovernor(max_fps, boost_fps)
+        self.gaze_ratio = 0.5  # smoothed, what the direction is decided on
+        self.raw_gaze_ratio = 0.5
+        self.on_frame = None  # called as on_frame(tracker, captured) after every processed frame
+
+        # perf_counter() timestamps of the last processed frame, see latency.py
+        self.detected = 0.0
+        self.classified = 0.0
+        self.direction_captured = 0.0  # capture time of the frame that last changed the direction
+        self.latency = LatencyTrace()
         
-    def start(self):
-        self.cap = cv2.VideoCapture(0)
+    def start(self, source=None):
+        """source: a FrameSource (see frame_sources.py), the default camera if None"""
+        global cv2
+        self.source = source if source is not None else CameraSource(0)
+        if not self.source.landmarks and self.face_mesh is None:
+            import cv2
+            import mediapipe as mp
+            self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+                max_num_faces=1,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
         self.running = True
         self.thread = threading.Thread(target=self._process_video)
         self.thread.daemon = True
         self.thread.start()
     
     def _process_video(self):
-        while self.running and self.cap.isOpened():
-            success, image = self.cap.read()
+        while self.running and self.source.is_open():
+            self.governor.wait()
+            success, frame, captured = self.source.read()
             if not success:
+                self.governor.failed_read()
                 continue
-                
-            # for mirror effect
-            image = cv2.flip(image, 1)
-
-            image.flags.writeable = False
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            results = self.face_mesh.process(image)
-            
-            # draw the face mesh annotations
-            image.flags.writeable = True
-            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-            
-            if results.multi_face_landmarks:
-                self._analyze_eye_position(results.multi_face_landmarks[0])
-
-            # cv2.imshow('MediaPipe Eye Tracking', image)
-            # if cv2.waitKey(5) & 0xFF == 27:
-            #     break
-                
-    def _analyze_eye_position(self, face_landmarks):
-        """Analyze eye gaze direction based on iris position relative to eye corners"""
-        
-        # iris relative position
-        def ratio(indices, iris_idx):
-            x_values = [face_landmarks.landmark[i].x for i in indices]
-            iris_x = face_landmarks.landmark[iris_idx].x
-            x_min = min(x_values)
-            x_max = max(x_values)
-            return (iris_x - x_min) / (x_max - x_min + 1e-6)
-            
-        left_ratio = ratio(self.LEFT_EYE, 468)  # 468 is LEFT_IRIS
-        right_ratio = ratio(self.RIGHT_EYE, 473)  # 473 is RIGHT_IRIS
-
-        gaze_ratio = (left_ratio + right_ratio) / 2
-        
-        current_time = time.time()
-        if current_time - self.last_direction_change >= self.direction_cooldown:
-            if gaze_ratio < 0.4:
-                new_direction = "left"
-            elif gaze_ratio > 0.6:
-                new_direction = "right"
-            else:
-                new_direction = "center"
-
-            if new_direction != self.look_direction:
-                self.look_direction = new_direction
-                self.last_direction_change = current_time
+
+            cpu_started = time.thread_time()
+            previous_ratio = self.gaze_ratio
+            self._process_frame(frame, captured)
+            self.classified = time.perf_counter()
+            self.latency.frame(captured, self.detected, self.classified)
+            self.frames_processed += 1
+            self.governor.frame_done(time.thread_time() - cpu_started, abs(self.gaze_ratio - previous_ratio))
+            if self.on_frame is not None:
+                self.on_frame(self, captured)
+
+    def _process_frame(self, frame, captured):
+        if self.source.landmarks:
+            # recorded landmarks, nothing to run FaceMesh on
+            self.detected = time.perf_counter()
+            if frame is not None:
+                self._analyze_eye_position(frame, captured)
+            return
+
+        if self._eyes_unchanged(frame):
+            # nothing moved around the eyes since FaceMesh last ran, its landmarks still hold
+            self.skipped_in_row += 1
+            self.frames_skipped += 1
+            instruments.count("eye.facemesh_skipped")
+            self.detected = time.perf_counter()
+            self._analyze_eye_position(self.last_landmarks, captured)
+            return
+        self.skipped_in_row = 0
+        instruments.count("eye.facemesh_runs")
+
+        # the frame is never shown, so no mirroring and no conversion back to BGR:
+        # the one copy made is the RGB conversion of the region FaceMesh looks at
+        image = self._region_image(frame)
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False
+        results = self.face_mesh.process(image)
+        self.detected = time.perf_counter()
+
+        if results.multi_face_landmarks:
+            face_landmarks = results.multi_face_landmarks[0]
+            self._analyze_eye_position(face_landmarks, captured)
+            if self.motion_gate:
+                self._update_eye_reference(face_landmarks, frame)
+            if self.roi_mode:
+                self._update_roi(face_landmarks, frame.shape)
+        else:
+            self.roi = None  # lost the face, search the full frame again
+            self.eye_boxes = None
+
+    def _eye_thumbnails(self, frame):
+        """Both eye regions of the frame, grayscale and shrunk to MOTION_SIZE"""
+        thumbnails = []
+        for x0, y0, x1, y1 in self.eye_boxes:
+            gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+            thumbnails.append(cv2.resize(gray, self.MOTION_SIZE, interpolation=cv2.INTER_AREA))
+        return thumbnails
+
+    def _eyes_unchanged(self, frame):
+        """Whether the eye regions look like they did when FaceMesh last ran (and it may be skipped)"""
+        if not self.motion_gate or self.eye_boxes is None or self.skipped_in_row >= self.max_skipped_frames:
+            return False
+        thumbnails = self._eye_thumbnails(frame)
+        # the larger change of the two eyes, so a single eye moving still counts
+        change = max(float(cv2.absdiff(thumbnail, reference).mean())
+                     for thumbnail, reference in zip(thumbnails, self.eye_reference))
+        return change < self.motion_threshold
+
+    def _update_eye_reference(self, face_landmarks, frame):
+        """Remember where the eyes are and what they looked like, for the motion gate"""
+        x0, y0, x1, y1 = self.region
+        height, width = frame.shape[:2]
+        boxes = []
+        for corner_a, corner_b in (self.LEFT_EYE, self.RIGHT_EYE):
+            a, b = face_landmarks.landmark[corner_a], face_landmarks.landmark[corner_b]
+            # landmarks are normalized to the processed region, see _update_roi
+            ax, ay = x0 + a.x * (x1 - x0), y0 + a.y * (y1 - y0)
+            bx, by = x0 + b.x * (x1 - x0), y0 + b.y * (y1 - y0)
+            half_width = abs(bx - ax) * 0.7
+            half_height = half_width * 0.6
+            cx, cy = (ax + bx) / 2, (ay + by) / 2
+            box = (max(0, int(cx - half_width)), max(0, int(cy - half_height)),
+                   min(width, int(cx + half_width)), min(height, int(cy + half_height)))
+            if box[2] - box[0] < self.MOTION_SIZE[0] or box[3] - box[1] < self.MOTION_SIZE[1]:
+                self.eye_boxes = None  # eyes too small or out of the frame, always run FaceMesh
+                return
+            boxes.append(box)
+
+        self.eye_boxes = boxes
+        self.eye_reference = self._eye_thumbnails(frame)
+        self.last_landmarks = face_landmarks
+
+    def _region_image(self, frame):
+        """The part of the frame to run FaceMesh on: the face region in ROI mode, else the full frame"""
+        if self.roi is None:
+            self.frames_full += 1
+            self.region = (0, 0, frame.shape[1], frame.shape[0])
+            return frame
+
+        self.frames_roi += 1
+        self.region = self.roi
+        x0, y0, x1, y1 = self.roi
+        image = frame[y0:y1, x0:x1]
+        longest = max(x1 - x0, y1 - y0)
+        if longest > self.roi_max_size:
+            scale = self.roi_max_size / longest
+            image = cv2.resize(image, (max(1, int((x1 - x0) * scale)), max(1, int((y1 - y0) * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return image
+
+    def _update_roi(self, face_landmarks, frame_shape):
+        """Move the region when the face gets close to its border, so FaceMesh mostly sees a steady crop"""
+        x0, y0, x1, y1 = self.region
+        points = [face_landmarks.landmark[i] for i in self.FACE_BOUNDS]
+        # landmarks are normalized to the processed region, which only differs from the crop by scale
+        face_x0 = x0 + min(p.x for p in points) * (x1 - x0)
+        face_x1 = x0 + max(p.x for p in points) * (x1 - x0)
+        face_y0 = y0 + min(p.y for p in points) * (y1 - y0)
+        face_y1 = y0 + max(p.y for p in points) * (y1 - y0)
+        margin = self.roi_margin * max(face_x1 - face_x0, face_y1 - face_y0)
+
+        if self.roi is not None:
+            rx0, ry0, rx1, ry1 = self.roi
+            half = margin / 2
+            if (face_x0 - rx0 > half and rx1 - face_x1 > half and
+                    face_y0 - ry0 > half and ry1 - face_y1 > half):
+                return
+
+        height, width = frame_shape[:2]
+        roi = (max(0, int(face_x0 - margin)), max(0, int(face_y0 - margin)),
+               min(width, int(face_x1 + margin)), min(height, int(face_y1 + margin)))
+        # a face (almost) outside the frame, look at the whole frame next time
+        self.roi = roi if roi[2] - roi[0] >= 32 and roi[3] - roi[1] >= 32 else None
+
+    def _gaze_landmarks_x(self, face_landmarks):
+        """x of the gaze landmarks, gathered in one pass"""
+        array = getattr(face_landmarks, "array", None)
+        if array is not None:
+            # recorded landmarks are already an array, one fancy index instead of a Python object per point
+            return array[self.gaze_landmarks, 0].tolist()
+        # FaceMesh results are protobuf messages; for six values a list beats building an array
+        landmark = face_landmarks.landmark
+        return [landmark[i].x for i in self.gaze_landmarks]
+
+    def _analyze_eye_position(self, face_landmarks, t=None):
+        """Analyze eye gaze direction based on iris position relative to eye corners, t: capture time"""
+        t = time.perf_counter() if t is None else t
+
+        # iris relative position, per eye
+        left_a, left_b, left_iris, right_a, right_b, right_iris = self._gaze_landmarks_x(face_landmarks)
+        left_min = min(left_a, left_b)
+        right_min = min(right_a, right_b)
+        left_ratio = (left_iris - left_min) / (max(left_a, left_b) - left_min + 1e-6)
+        right_ratio = (right_iris - right_min) / (max(right_a, right_b) - right_min + 1e-6)
+
+        # mirrored, as if looking at the flipped (selfie view) image: looking left gives a low ratio
+        gaze_ratio = 1 - (left_ratio + right_ratio) / 2
+        self.raw_gaze_ratio = gaze_ratio
+        if self.gaze_filter is not None:
+            gaze_ratio = self.gaze_filter(gaze_ratio, t)
+        self.gaze_ratio = gaze_ratio
+        direction = self.classifier(gaze_ratio, t)
+        if direction != self.look_direction:
+            # before the direction itself, so a reader that sees the new direction sees this change
+            self.direction_captured = t
+        self.look_direction = direction
     
     def get_direction(self):
-        return self.look_direction
+        direction = self.look_direction
+        self.latency.read(self.classified, self.direction_captured)
+        return direction
+
+    @property
+    def fps(self):
+        """Frames processed per second"""
+        return self.governor.fps
+
+    @property
+    def skip_ratio(self):
+        """Fraction of processed frames that reused the previous landmarks instead of running FaceMesh"""
+        return self.frames_skipped / self.frames_processed if self.frames_processed else 0.0
+
+    @property
+    def cpu_per_frame(self):
+        """Seconds of tracker thread CPU time per processed frame"""
+        return self.governor.cpu_per_frame
     
     def stop(self):
         """Stop the eye tracker and clean up resources"""
         self.running = False
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=1.0)
-        if self.cap and self.cap.isOpened():
-            self.cap.release()
-        self.cap = None
+        if self.source:
+            self.source.release()
+        self.source = None
         self.thread = None
         print("Eye tracker stopped")
\ No newline at end of file
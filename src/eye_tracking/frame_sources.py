@@ -0,0 +1,242 @@
+"""
+Where EyeTracker gets its frames from.
+
+- CameraSource: a live webcam (the default)
+- VideoFileSource: a recorded video, FaceMesh runs on every frame
+- LandmarkSource: recorded FaceMesh landmarks, FaceMesh is skipped entirely
+
+Recorded sources play back either paced like the recording (realtime=True, frames
+the reader is too slow for are dropped, as with a live camera) or as fast as they
+can be read, so the tracker can be benchmarked and regression tested without a
+webcam. Record landmarks from the camera or a video with:
+
+    python src/eye_tracking/frame_sources.py landmarks.npz --seconds 30 [--video clip.mp4]
+"""
+
+import argparse
+import time
+import numpy as np
+from abc import ABC, abstractmethod
+
+
+class FrameSource(ABC):
+    """read() returns (success, frame, capture_time); frame is an image, or a landmark set if landmarks is True"""
+    landmarks = False
+
+    @abstractmethod
+    def read(self):
+        pass
+
+    @abstractmethod
+    def is_open(self):
+        pass
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    def __init__(self, index=0):
+        import cv2
+        self.cap = cv2.VideoCapture(index)
+        # keep only the newest frame, so a capped processing rate does not read stale frames
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def read(self):
+        success, frame = self.cap.read()
+        return success, frame, time.perf_counter()
+
+    def is_open(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        if self.cap.isOpened():
+            self.cap.release()
+
+
+class _Pacer:
+    """Sleeps so that frames come out at their recorded times, when realtime"""
+
+    def __init__(self, realtime):
+        self.realtime = realtime
+        self.started = None
+
+    def elapsed(self):
+        """Seconds of the recording that have played, None if not pacing (yet)"""
+        if not self.realtime or self.started is None:
+            return None
+        return time.perf_counter() - self.started
+
+    def wait(self, offset):
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now - offset
+        delay = self.started + offset - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=True, loop=False):
+        import cv2
+        self.cv2 = cv2
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.loop = loop
+        self.pacer = _Pacer(realtime)
+        self.frame_index = 0
+        self.dropped = 0
+
+    def read(self):
+        elapsed = self.pacer.elapsed()
+        if elapsed is not None:
+            # skip the frames a live camera would not have delivered anymore
+            while (self.frame_index + 1) / self.fps <= elapsed and self.cap.grab():
+                self.frame_index += 1
+                self.dropped += 1
+        success, frame = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(self.cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+        if not success:
+            self.release()
+            return False, None, time.perf_counter()
+        self.pacer.wait(self.frame_index / self.fps)
+        self.frame_index += 1
+        return True, frame, time.perf_counter()
+
+    def is_open(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        if self.cap.isOpened():
+            self.cap.release()
+
+
+class _Point:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+
+class RecordedLandmarks:
+    """One recorded face, accessed like a FaceMesh result: .landmark[i].x/.y/.z"""
+
+    def __init__(self, array):
+        self.array = array  # (n_landmarks, 3)
+        self.landmark = self
+
+    def __getitem__(self, idx):
+        x, y, z = self.array[idx].tolist()
+        return _Point(x, y, z)
+
+    def __len__(self):
+        return len(self.array)
+
+
+class LandmarkSource(FrameSource):
+    """
+    Landmarks recorded by record_landmarks: times (n,) in seconds from the start and
+    landmarks (n, 478, 3), NaN for frames without a face (read gives None for those).
+    """
+    landmarks = True
+
+    def __init__(self, path=None, realtime=True, loop=False, times=None, landmarks=None):
+        if path is not None:
+            data = np.load(path)
+            times, landmarks = data["times"], data["landmarks"]
+        self.times = np.asarray(times, dtype=np.float64)
+        self.frames = np.asarray(landmarks, dtype=np.float32)
+        self.loop = loop
+        self.pacer = _Pacer(realtime)
+        self.index = 0
+        self.laps = 0
+        self.dropped = 0
+        self.open = len(self.frames) > 0
+        if not self.open:
+            # an empty recording, nothing to index
+            self.has_face = np.zeros(0, dtype=bool)
+            self.duration = 0.0
+            return
+        self.has_face = ~np.isnan(self.frames[:, 0, 0])
+        # length of one lap, the last frame lasts as long as the one before it
+        self.duration = self.times[-1] + (self.times[-1] - self.times[-2] if len(self.times) > 1 else 0)
+
+    def read(self):
+        if self.index == len(self.frames):
+            if not self.loop:
+                self.open = False
+                return False, None, time.perf_counter()
+            self.index = 0
+            self.laps += 1
+
+        idx = self.index
+        elapsed = self.pacer.elapsed()
+        if elapsed is not None:
+            # jump to the newest frame that is already due, like a live camera
+            latest = int(np.searchsorted(self.times, elapsed - self.laps * self.duration, side="right")) - 1
+            latest = min(latest, len(self.frames) - 1)
+            if latest > idx:
+                self.dropped += latest - idx
+                idx = latest
+        self.index = idx + 1
+        self.pacer.wait(self.laps * self.duration + self.times[idx])
+        face = RecordedLandmarks(self.frames[idx]) if self.has_face[idx] else None
+        return True, face, time.perf_counter()
+
+    def is_open(self):
+        return self.open
+
+    def release(self):
+        self.open = False
+
+
+def record_landmarks(source, out_path, seconds=30.0, n_landmarks=478):
+    """Run FaceMesh on frames from source and save the landmarks for LandmarkSource"""
+    import cv2
+    import mediapipe as mp
+
+    face_mesh = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True,
+                                                min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    times, frames = [], []
+    started = None
+    while source.is_open():
+        success, frame, captured = source.read()
+        if not success:
+            continue
+        started = captured if started is None else started
+        if captured - started > seconds:
+            break
+
+        results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        landmarks = np.full((n_landmarks, 3), np.nan, dtype=np.float32)
+        if results.multi_face_landmarks:
+            points = results.multi_face_landmarks[0].landmark
+            landmarks[:] = [(p.x, p.y, p.z) for p in points[:n_landmarks]]
+        times.append(captured - started)
+        frames.append(landmarks)
+
+    source.release()
+    np.savez_compressed(out_path, times=np.array(times), landmarks=np.array(frames))
+    return len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record FaceMesh landmarks for replaying into EyeTracker")
+    parser.add_argument("output", help=".npz to write")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--video", help="record from a video file instead of the camera")
+    parser.add_argument("--camera", type=int, default=0)
+    args = parser.parse_args()
+
+    source = VideoFileSource(args.video, realtime=False) if args.video else CameraSource(args.camera)
+    n_frames = record_landmarks(source, args.output, args.seconds)
+    print(f"Recorded {n_frames} frames to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
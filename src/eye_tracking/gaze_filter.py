@@ -0,0 +1,93 @@
+"""
+Smoothing and classification of the gaze ratio into a look direction.
+
+The raw ratio jitters by a few hundredths from frame to frame, which used to be
+hidden behind fixed 0.4/0.6 thresholds and a 0.5 s cooldown between direction
+changes. That cooldown was most of the input latency in eye control mode. With a
+One-Euro filter on the ratio (heavy smoothing while the gaze rests, little lag
+while it moves) and hysteresis around the thresholds the cooldown can be much
+shorter. See benchmarks/bench_eye_tracking.py for the latency and false switch
+comparison.
+
+One-Euro filter: Casiez, Roussel and Vogel, CHI 2012.
+"""
+
+import math
+
+
+class OneEuroFilter:
+    def __init__(self, min_cutoff=1.0, beta=5.0, d_cutoff=1.0):
+        """
+        min_cutoff: cutoff frequency (Hz) while the value is steady, lower smooths more
+        beta: how much the cutoff rises with the speed of the value, higher lags less
+        d_cutoff: cutoff frequency (Hz) for the speed estimate
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.speed = 0.0
+        self.t = None
+
+    @staticmethod
+    def _alpha(dt, cutoff):
+        tau = 1 / (2 * math.pi * cutoff)
+        return 1 / (1 + tau / dt)
+
+    def __call__(self, value, t):
+        """Filtered value for a sample taken at time t (seconds)"""
+        if self.t is None:
+            self.value, self.t = value, t
+            return value
+        dt = t - self.t
+        if dt <= 0:
+            return self.value
+
+        self.speed += self._alpha(dt, self.d_cutoff) * ((value - self.value) / dt - self.speed)
+        cutoff = self.min_cutoff + self.beta * abs(self.speed)
+        self.value += self._alpha(dt, cutoff) * (value - self.value)
+        self.t = t
+        return self.value
+
+
+class DirectionClassifier:
+    """Maps gaze ratios to "left"/"center"/"right" with hysteresis and a cooldown between changes"""
+
+    def __init__(self, left=0.4, right=0.6, hysteresis=0.0, cooldown=0.5):
+        """
+        left/right: the ratio thresholds, a lower ratio is looking left
+        hysteresis: the current direction's zone is widened by this much, so a ratio hovering
+            around a threshold does not flip the direction back and forth
+        cooldown: minimum seconds between direction changes
+        """
+        self.left = left
+        self.right = right
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.reset()
+
+    def reset(self):
+        self.direction = "center"
+        self.last_change = -math.inf
+
+    def __call__(self, ratio, t):
+        if t - self.last_change < self.cooldown:
+            return self.direction
+
+        h = self.hysteresis
+        left = self.left + (h if self.direction == "left" else -h)
+        right = self.right - (h if self.direction == "right" else -h)
+        if ratio < left:
+            direction = "left"
+        elif ratio > right:
+            direction = "right"
+        else:
+            direction = "center"
+
+        if direction != self.direction:
+            self.direction = direction
+            self.last_change = t
+        return direction
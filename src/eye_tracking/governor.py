@@ -0,0 +1,66 @@
+"""
+Frame-rate governor for the eye tracker thread.
+
+The game only reads the gaze direction once per frame and ignores changes inside
+the direction cooldown, so running FaceMesh at the camera's full rate mostly
+takes CPU away from the render loop. The governor caps the processing rate,
+raises it for a moment while the gaze is moving, and backs off exponentially
+when the source fails to deliver frames instead of spinning.
+"""
+
+import time
+
+
+class FrameRateGovernor:
+    def __init__(self, max_fps=15, boost_fps=30, boost_duration=1.0, boost_threshold=0.05, max_backoff=0.5):
+        """
+        max_fps: processing rate cap while the gaze is steady, None for no cap
+        boost_fps: rate cap for boost_duration seconds after the gaze ratio moved more than boost_threshold
+        max_backoff: longest sleep after consecutive failed reads, in seconds
+        """
+        self.max_fps = max_fps
+        self.boost_fps = boost_fps
+        self.boost_duration = boost_duration
+        self.boost_threshold = boost_threshold
+        self.max_backoff = max_backoff
+
+        self.backoff = 0.0
+        self.boost_until = 0.0
+        self.frame_started = 0.0
+        self.last_frame_done = None
+        self.failed_reads = 0
+
+        # exposed stats, exponential moving averages over processed frames
+        self.fps = 0.0
+        self.cpu_per_frame = 0.0  # seconds of tracker thread CPU time per processed frame
+
+    @property
+    def boosted(self):
+        return time.perf_counter() < self.boost_until
+
+    def wait(self):
+        """Sleep until the next frame is due"""
+        if self.max_fps is not None:
+            rate = self.boost_fps if self.boosted else self.max_fps
+            delay = self.frame_started + 1 / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.frame_started = time.perf_counter()
+
+    def failed_read(self):
+        self.failed_reads += 1
+        self.backoff = min(self.max_backoff, self.backoff * 2 if self.backoff else 0.005)
+        time.sleep(self.backoff)
+
+    def frame_done(self, cpu_time, gaze_delta=0.0):
+        now = time.perf_counter()
+        self.backoff = 0.0
+        if gaze_delta > self.boost_threshold:
+            self.boost_until = now + self.boost_duration
+
+        if self.last_frame_done is not None:
+            interval = now - self.last_frame_done
+            fps = 1 / interval if interval > 0 else 0.0
+            self.fps = fps if self.fps == 0 else 0.9 * self.fps + 0.1 * fps
+        self.last_frame_done = now
+        self.cpu_per_frame = cpu_time if self.cpu_per_frame == 0 else 0.9 * self.cpu_per_frame + 0.1 * cpu_time
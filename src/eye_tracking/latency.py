@@ -0,0 +1,77 @@
+"""
+Capture-to-action latency of eye-controlled lane switches.
+
+Every processed frame is timestamped at capture, when its landmarks are ready
+(FaceMesh returned, or a recorded frame was read) and when its direction was
+classified. The game adds the time get_direction() first returned that result
+and the time the lane switch was applied. Each stage goes into a rolling
+histogram in `instruments` (ms), so it shows up in the F3 overlay and in the
+metrics dump:
+
+    eye.to_landmarks       capture until the landmarks were ready
+    eye.to_direction       landmarks until the direction was classified
+    eye.to_read            classified until get_direction() returned it
+    eye.to_switch          a new direction was read until switch_lane() was applied
+    eye.capture_to_switch  capture of the frame that changed the direction until the switch
+
+Timestamps are time.perf_counter(), which is comparable across processes on the
+platforms the game runs on, so the same stages work for ProcessEyeTracker.
+"""
+
+from time import perf_counter
+from instrumentation import instruments
+
+
+STAGES = ["eye.to_landmarks", "eye.to_direction", "eye.to_read", "eye.to_switch", "eye.capture_to_switch"]
+WINDOW = 500  # values per stage; at 15-30 processed frames per second, the last 15-30 s
+
+for _name in STAGES:
+    instruments.set_window(_name, WINDOW)
+
+
+class LatencyTrace:
+    """
+    frame() runs on the tracker thread and only feeds the per-frame stages. The state that
+    matches a direction change to a lane switch is only touched by read() and switch(), which
+    both run on the game thread, so no lock is needed.
+    """
+
+    def __init__(self):
+        self.last_read = None  # classification time of the last frame get_direction() returned
+        self.last_change = None  # capture time of the frame that last changed the direction
+        self.change_captured = None  # same, until a lane switch used it
+        self.change_read = None  # when get_direction() first returned that change
+
+    def frame(self, captured, detected, classified):
+        """A processed frame"""
+        if not instruments.enabled:
+            return
+        instruments.observe("eye.to_landmarks", (detected - captured) * 1000)
+        instruments.observe("eye.to_direction", (classified - detected) * 1000)
+
+    def read(self, classified, changed_at):
+        """
+        get_direction() returned the result of the frame classified at `classified`.
+        changed_at: capture time of the frame that last changed the direction; the tracker sets it
+        before the direction, so reading it after the direction never gives an older change.
+        """
+        if not instruments.enabled:
+            return
+        now = perf_counter()
+        if changed_at and changed_at != self.last_change:
+            self.last_change = changed_at
+            self.change_captured = changed_at
+            self.change_read = now
+        if classified and classified != self.last_read:
+            self.last_read = classified
+            instruments.observe("eye.to_read", (now - classified) * 1000)
+
+    def switch(self):
+        """The game applied a lane switch for the current direction"""
+        if not instruments.enabled or self.change_captured is None:
+            return
+        now = perf_counter()
+        instruments.observe("eye.capture_to_switch", (now - self.change_captured) * 1000)
+        instruments.observe("eye.to_switch", (now - self.change_read) * 1000)
+        instruments.count("eye.lane_switches")
+        self.change_captured = None
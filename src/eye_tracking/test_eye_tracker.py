@@ -1,6 +1,7 @@
 import cv2
 import mediapipe as mp
 import numpy as np
+import time
 
 
 mp_face_mesh = mp.solutions.face_mesh
@@ -28,18 +29,26 @@ ARROW_ACTIVE = (150, 255, 150)
 ARROW_INACTIVE = (70, 70, 70)
 BALL_COLOR = (255, 255, 255)
 GAZE_TEXT_COLOR = (150, 190, 230)
+STATS_TEXT_COLOR = (160, 160, 160)
+
+# tesselation edges as an (n_edges, 2) array of landmark indices, drawn in one polylines call
+TESSELATION = np.array(sorted(mp_face_mesh.FACEMESH_TESSELATION), dtype=np.int32)
 
 cap = cv2.VideoCapture(0)
 
 
 def create_gradient_background(h, w, top_color, bottom_color):
     """Create a vertical gradient background."""
-    bg = np.zeros((h, w, 3), dtype=np.uint8)
-    for y in range(h):
-        alpha = y / h
-        color = (np.array(top_color) * (1 - alpha) + np.array(bottom_color) * alpha).astype(np.uint8)
-        bg[y, :] = color
-    return bg
+    alpha = (np.arange(h) / h)[:, None]
+    column = np.array(top_color) * (1 - alpha) + np.array(bottom_color) * alpha
+    return np.repeat(column.astype(np.uint8)[:, None, :], w, axis=1)
+
+
+def draw_tesselation(img, lm):
+    """Draw the face mesh with one batched polylines call."""
+    h, w = img.shape[:2]
+    points = (np.array([(p.x, p.y) for p in lm]) * (w, h)).astype(np.int32)
+    cv2.polylines(img, points[TESSELATION], False, CONTOUR_COLOR, 1)
 
 
 def draw_arrow(img, side, active):
@@ -89,14 +98,24 @@ def draw_eye_details(bg, center, iris_radius=10, pupil_radius=4):
 
 
 def main():
+    background = None  # the gradient, computed once per frame size
+    bg = None
+    fps = 0.0
+    frame_ms = 0.0
+    last_frame = time.perf_counter()
+
     while cap.isOpened():
         ret, frame = cap.read()
         if not ret:
             break
+        started = time.perf_counter()
 
         frame = cv2.flip(frame, 1)
         h, w = frame.shape[:2]
-        bg = create_gradient_background(h, w, COLOR_TOP, COLOR_BOTTOM)
+        if background is None or background.shape[:2] != (h, w):
+            background = create_gradient_background(h, w, COLOR_TOP, COLOR_BOTTOM)
+            bg = np.empty_like(background)
+        np.copyto(bg, background)
 
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = face_mesh.process(rgb)
@@ -105,13 +124,7 @@ def main():
         if results.multi_face_landmarks:
             lm = results.multi_face_landmarks[0].landmark
             direction = get_gaze(lm)
-
-            for conn in mp_face_mesh.FACEMESH_TESSELATION:
-                p1 = lm[conn[0]]
-                p2 = lm[conn[1]]
-                x1, y1 = int(p1.x * w), int(p1.y * h)
-                x2, y2 = int(p2.x * w), int(p2.y * h)
-                cv2.line(bg, (x1, y1), (x2, y2), CONTOUR_COLOR, 1)
+            draw_tesselation(bg, lm)
 
             for iris_idx in [LEFT_IRIS, RIGHT_IRIS]:
                 cx, cy = int(lm[iris_idx].x * w), int(lm[iris_idx].y * h)
@@ -127,6 +140,14 @@ def main():
         cv2.putText(bg, f"Gaze: {direction}", (w // 2 - 110, 110),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, GAZE_TEXT_COLOR, 2)
 
+        # fps over the whole loop (camera included), frame time is the processing and drawing only
+        now = time.perf_counter()
+        interval, last_frame = now - last_frame, now
+        fps = 0.9 * fps + 0.1 / interval if fps else 1 / interval
+        frame_ms = 0.9 * frame_ms + 0.1 * (now - started) * 1000 if frame_ms else (now - started) * 1000
+        cv2.putText(bg, f"FPS: {fps:.1f}  frame: {frame_ms:.1f} ms", (10, 25),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, STATS_TEXT_COLOR, 1, cv2.LINE_AA)
+
         cv2.imshow("Gaze Visualizer", bg)
         if cv2.waitKey(1) & 0xFF == 27:
             break
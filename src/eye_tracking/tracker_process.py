@@ -0,0 +1,241 @@
+"""
+EyeTracker in a separate worker process.
+
+Capture, FaceMesh and the landmark analysis all hold the GIL for a while on every
+frame, which shows up as frame pacing jitter in the render loop. ProcessEyeTracker
+runs them in a child process instead. The child publishes its latest result into a
+small shared-memory record; the game only reads that record, so get_direction()
+never waits for the tracker.
+
+The record is a seqlock: the writer makes the sequence counter odd while it writes
+and even again when it is done, and a reader retries when it saw an odd counter or
+the counter changed during its read.
+
+The worker is started as `python -m eye_tracking.tracker_process` rather than with
+multiprocessing, which would re-run app.py in the child on spawn platforms.
+"""
+
+import argparse
+import atexit
+import os
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from pathlib import Path
+from eye_tracking.latency import LatencyTrace
+
+
+DIRECTIONS = ["left", "center", "right"]
+
+# slots of the shared record (float64 each)
+(SEQ, STATE, DIRECTION, GAZE_RATIO, CAPTURED, DETECTED, CLASSIFIED, DIRECTION_CAPTURED,
+ FPS, CPU_PER_FRAME, FRAMES, SKIP_RATIO) = range(12)
+RECORD_SIZE = 12
+STARTING, RUNNING = 0.0, 1.0
+
+
+def _attach(name):
+    """Open an existing record without letting this process's resource tracker unlink it at exit"""
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)  # python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class ProcessEyeTracker:
+    """Same interface as EyeTracker (start, get_direction, stop), with the tracker in a child process"""
+
+    def __init__(self, roi_mode=False, max_fps=15, boost_fps=30, camera=0, video=None, landmarks=None,
+                 start_timeout=30.0):
+        """
+        camera/video/landmarks: where the worker reads frames from, a recorded video or
+            landmarks file (see frame_sources.py) take precedence over the camera
+        start_timeout: seconds to wait for the worker to open its source
+        """
+        self.roi_mode = roi_mode
+        self.max_fps = max_fps
+        self.boost_fps = boost_fps
+        self.camera = camera
+        self.video = video
+        self.landmarks = landmarks
+        self.start_timeout = start_timeout
+
+        self.shm = None
+        self.record = None
+        self.process = None
+        self.last_seq = -1
+        self.values = np.zeros(RECORD_SIZE)
+        self.latency = LatencyTrace()
+        atexit.register(self.stop)
+
+    def start(self):
+        """Start the worker and wait until it is processing frames, RuntimeError if it does not get there"""
+        self.shm = shared_memory.SharedMemory(create=True, size=RECORD_SIZE * 8)
+        self.record = np.ndarray((RECORD_SIZE,), dtype=np.float64, buffer=self.shm.buf)
+        self.record[:] = 0
+        self.record[DIRECTION] = DIRECTIONS.index("center")
+        self.record[GAZE_RATIO] = 0.5
+
+        command = [sys.executable, "-m", "eye_tracking.tracker_process", self.shm.name,
+                   "--camera", str(self.camera)]
+        if self.video:
+            command += ["--video", str(self.video)]
+        if self.landmarks:
+            command += ["--landmarks", str(self.landmarks)]
+        if self.roi_mode:
+            command.append("--roi")
+        command += ["--max-fps", str(self.max_fps or 0), "--boost-fps", str(self.boost_fps)]
+
+        src_dir = str(Path(__file__).parent.parent.absolute())
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")])))
+        # the worker runs until its stdin is closed, so it also goes away if the game crashes
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, env=env)
+
+        deadline = time.perf_counter() + self.start_timeout
+        while self.record[STATE] != RUNNING:
+            if self.process.poll() is not None:
+                code = self.process.returncode
+                self.stop()
+                raise RuntimeError(f"eye tracker process exited with code {code}")
+            if time.perf_counter() > deadline:
+                self.stop()
+                raise RuntimeError("eye tracker process did not start in time")
+            time.sleep(0.01)
+
+    def read(self):
+        """Latest published values (a copy of the record), consistent across all slots"""
+        if self.record is None:
+            return self.values
+        while True:
+            seq = self.record[SEQ]
+            if seq == self.last_seq:
+                return self.values
+            if seq % 2 == 0:
+                values = self.record.copy()
+                if self.record[SEQ] == seq:
+                    self.values = values
+                    self.last_seq = seq
+                    # only the frames the game happens to read are traced, the worker has no instruments
+                    self.latency.frame(values[CAPTURED], values[DETECTED], values[CLASSIFIED])
+                    return values
+            time.sleep(0)  # the worker is writing, let it finish
+
+    def get_direction(self):
+        values = self.read()
+        self.latency.read(values[CLASSIFIED], values[DIRECTION_CAPTURED])
+        return DIRECTIONS[int(values[DIRECTION])]
+
+    @property
+    def gaze_ratio(self):
+        return self.read()[GAZE_RATIO]
+
+    @property
+    def captured(self):
+        """perf_counter() time the latest result's frame was captured at, in the worker"""
+        return self.read()[CAPTURED]
+
+    @property
+    def fps(self):
+        return self.read()[FPS]
+
+    @property
+    def cpu_per_frame(self):
+        return self.read()[CPU_PER_FRAME]
+
+    @property
+    def frames_processed(self):
+        return int(self.read()[FRAMES])
+
+    @property
+    def skip_ratio(self):
+        return self.read()[SKIP_RATIO]
+
+    def stop(self):
+        """Stop the worker and free the shared record"""
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+            print("Eye tracker process stopped")
+        if self.shm is not None:
+            self.read()  # keep the last values around after the record is gone
+            self.record = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def publish(record, tracker, captured):
+    """Write the tracker's latest result into the record (worker side)"""
+    record[SEQ] += 1  # odd: being written
+    record[DIRECTION] = DIRECTIONS.index(tracker.look_direction)
+    record[GAZE_RATIO] = tracker.gaze_ratio
+    record[CAPTURED] = captured
+    record[DETECTED] = tracker.detected
+    record[CLASSIFIED] = tracker.classified
+    record[DIRECTION_CAPTURED] = tracker.direction_captured
+    record[FPS] = tracker.fps
+    record[CPU_PER_FRAME] = tracker.cpu_per_frame
+    record[FRAMES] = tracker.frames_processed
+    record[SKIP_RATIO] = tracker.skip_ratio
+    record[SEQ] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eye tracker worker process, started by ProcessEyeTracker")
+    parser.add_argument("record", help="name of the shared memory record to publish into")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--video")
+    parser.add_argument("--landmarks")
+    parser.add_argument("--roi", action="store_true")
+    parser.add_argument("--max-fps", type=float, default=15, help="0 for no cap")
+    parser.add_argument("--boost-fps", type=float, default=30)
+    args = parser.parse_args()
+
+    from eye_tracking.eye_tracker import EyeTracker
+    from eye_tracking.frame_sources import CameraSource, LandmarkSource, VideoFileSource
+
+    shm = _attach(args.record)
+    record = np.ndarray((RECORD_SIZE,), dtype=np.float64, buffer=shm.buf)
+
+    if args.landmarks:
+        source = LandmarkSource(args.landmarks, loop=True)
+    elif args.video:
+        source = VideoFileSource(args.video, loop=True)
+    else:
+        source = CameraSource(args.camera)
+    if not source.is_open():
+        print("Eye tracker process could not open its frame source")
+        sys.exit(1)
+
+    tracker = EyeTracker(roi_mode=args.roi, max_fps=args.max_fps or None, boost_fps=args.boost_fps)
+    tracker.on_frame = lambda tracker, captured: publish(record, tracker, captured)
+    tracker.start(source)
+    record[STATE] = RUNNING
+
+    # stdin reaches EOF when the game calls stop() or exits
+    stdin_closed = threading.Event()
+    threading.Thread(target=lambda: (sys.stdin.read(), stdin_closed.set()), daemon=True).start()
+    while not stdin_closed.wait(0.1) and tracker.thread.is_alive():
+        pass
+
+    tracker.stop()
+    del record
+    shm.close()
+
+
+if __name__ == "__main__":
+    main()
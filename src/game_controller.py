@@ -21,11 +21,11 @@ class GameController:
         self.last_obstacle_z = 0
         self.lane_switch_cooldown = 0
         self.jumping = False
-        self.ai_jumping = False
+        self.ai_jumping = set()  # ids of the AI players in the air
         self.eye_command_processed = True
         self.last_eye_direction = "center"
 
-    def reset_game(self, player, ai_player):
+    def reset_game(self, player, ai_players):
         for obstacle in self.obstacles[:]:
             destroy(obstacle)
         self.obstacles.clear()
@@ -35,10 +35,11 @@ class GameController:
         self.last_obstacle_z = 0
         self.ai_score = 0
         self.jumping = False
-        self.ai_jumping = False
+        self.ai_jumping.clear()
 
         player.reset()
-        ai_player.reset()
+        for ai_player in ai_players:
+            ai_player.reset()
 
     def handle_jumping(self, player, jump_key_pressed):
         is_grounded = player.y <= 0.01
@@ -59,18 +60,20 @@ class GameController:
             player.y = 0
 
     def handle_ai_jumping(self, ai_player, ai_action):
-        if ai_action == 3 and ai_player.y <= 0.01 and not self.ai_jumping:
-            self.ai_jumping = True
+        jumping = id(ai_player) in self.ai_jumping
+        if ai_action == 3 and ai_player.y <= 0.01 and not jumping:
+            self.ai_jumping.add(id(ai_player))
+            jumping = True
             ai_player.y_velocity = 4
 
-        if self.ai_jumping:
+        if jumping:
             ai_player.y += ai_player.y_velocity * time.dt
             ai_player.y_velocity = apply_gravity(
                 ai_player.y_velocity, self.gravity, time.dt)
             if ai_player.y <= 0 and ai_player.y_velocity < 0:
                 ai_player.y = 0
                 ai_player.y_velocity = 0
-                self.ai_jumping = False
+                self.ai_jumping.discard(id(ai_player))
         if ai_player.y < 0:
             ai_player.y = 0
 
@@ -90,10 +93,12 @@ class GameController:
             if not self.eye_command_processed and current_direction != "center":
                 if current_direction == "left" and player.lane_index > 0:
                     player.switch_lane(player.lane_index - 1)
+                    eye_tracker.latency.switch()
                     self.lane_switch_cooldown = 0.3
                     self.eye_command_processed = True
                 elif current_direction == "right" and player.lane_index < len(self.lanes) - 1:
                     player.switch_lane(player.lane_index + 1)
+                    eye_tracker.latency.switch()
                     self.lane_switch_cooldown = 0.3
                     self.eye_command_processed = True
 
@@ -0,0 +1,210 @@
+"""
+Lightweight timers, counters and histograms for finding where frame time goes.
+
+    from instrumentation import instruments
+
+    with instruments.timer("frame.collisions"):
+        check_collisions()
+    instruments.count("ai.decisions")
+
+Everything is a no-op while `instruments.enabled` is False: timer() returns a
+shared do-nothing context manager and count()/observe() return right away.
+Histograms have fixed log-spaced bins, so their memory use does not grow with
+play time. Names given a window with set_window() keep only their most recent
+values instead, for numbers that should follow current conditions.
+"""
+
+import csv
+import json
+from bisect import bisect_right
+from collections import deque
+from time import perf_counter
+
+
+# bin edges in ms: 1us .. ~16s, 8 bins per factor of 2
+BIN_EDGES = [0.001 * 2 ** (i / 8) for i in range(8 * 24 + 1)]
+
+
+class Histogram:
+    __slots__ = ("bins", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.bins = [0] * (len(BIN_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, value):
+        self.bins[bisect_right(BIN_EDGES, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """Upper edge of the bin holding the q-th percentile (q in 0..100)"""
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for idx, n in enumerate(self.bins):
+            seen += n
+            if seen >= target and n:
+                return min(BIN_EDGES[idx] if idx < len(BIN_EDGES) else self.max, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+        }
+
+
+class RollingHistogram:
+    """The last `size` values, same interface as Histogram; percentiles are exact"""
+    __slots__ = ("values", "count")
+
+    def __init__(self, size):
+        self.values = deque(maxlen=size)
+        self.count = 0  # all values ever added, the stats below only cover the window
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+
+    def percentile(self, q):
+        if not self.values:
+            return 0.0
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    @property
+    def max(self):
+        return max(self.values) if self.values else 0.0
+
+    def summary(self):
+        values = self.values
+        return {
+            "count": self.count,
+            "mean": sum(values) / len(values) if values else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "min": min(values) if values else 0.0,
+            "max": self.max,
+        }
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Timer:
+    """Records the time spent inside `with` into a histogram, in ms"""
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.add((perf_counter() - self.started) * 1000)
+        return False
+
+
+class Instruments:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}  # timers and observed values, by name
+        self.counters = {}
+        self.windows = {}  # names that keep a rolling window of values, and its size
+
+    def set_window(self, name, size):
+        """Keep only the last `size` values of the histogram `name`"""
+        self.windows[name] = size
+        self.histograms.pop(name, None)
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        # a new Timer per use, so the same name can be timed from several threads
+        return Timer(self._histogram(name))
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        """Add a value (e.g. a latency in ms) to the histogram `name`"""
+        if self.enabled:
+            self._histogram(name).add(value)
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            size = self.windows.get(name)
+            histogram = Histogram() if size is None else RollingHistogram(size)
+            self.histograms[name] = histogram
+        return histogram
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+
+    def snapshot(self):
+        return {
+            "histograms": {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def report(self, names=None):
+        """Multi-line text summary, e.g. for an in-game overlay"""
+        lines = [f"{'':<22}{'p50':>7}{'p95':>7}{'max':>7} ms"]
+        for name, histogram in sorted(self.histograms.items()):
+            if names is None or any(name.startswith(prefix) for prefix in names):
+                lines.append(f"{name:<22}{histogram.percentile(50):7.2f}{histogram.percentile(95):7.2f}"
+                             f"{histogram.max:7.2f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<22}{value:>7}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write the snapshot to path, as CSV (one row per histogram/counter) or JSON by extension"""
+        snapshot = self.snapshot()
+        if str(path).endswith(".csv"):
+            fields = ["name", "count", "mean", "p50", "p95", "p99", "min", "max"]
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                for name, summary in snapshot["histograms"].items():
+                    writer.writerow(dict(summary, name=name))
+                for name, value in snapshot["counters"].items():
+                    writer.writerow({"name": name, "count": value})
+        else:
+            with open(path, "w") as f:
+                json.dump(snapshot, f, indent=2)
+
+
+# shared by the game loop and the AI controller
+instruments = Instruments()
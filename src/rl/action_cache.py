@@ -0,0 +1,124 @@
+"""
+Memoized policy decisions for the game.
+
+Most frames the AI sees nearly the same state as the frame before: same lane, same
+obstacle rows, a slightly shorter distance. ActionCache keys decisions on the raw
+observation rounded to a grid of `step` (a scalar or one step per feature) and
+only runs the policy for observations that fall into a grid cell it has not seen
+recently.
+
+A coarser step means more hits and more decisions that differ from what the
+policy would have done for the exact observation. Measure that trade-off on
+EyeBallEnv rollouts with:
+
+    python src/rl/action_cache.py --steps 0.1 0.25 0.5 1.0
+"""
+
+import sys
+import argparse
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+
+class ActionCache:
+    def __init__(self, step=0.25, size=4096):
+        self.step = np.asarray(step, dtype=np.float32)
+        self.size = size
+        self.entries = OrderedDict()  # quantized observation bytes -> action
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, observation):
+        return np.round(observation / self.step).astype(np.int32).tobytes()
+
+    def actions(self, observations, predict):
+        """
+        Actions for a matrix of raw observations, one row per agent.
+        predict(observations) is only called for the rows that miss, in one batch.
+        """
+        actions = np.zeros(len(observations), dtype=np.int64)
+        keys = [self.key(observation) for observation in observations]
+        missed = []
+        for row, key in enumerate(keys):
+            action = self.entries.get(key)
+            if action is None:
+                missed.append(row)
+            else:
+                self.entries.move_to_end(key)
+                actions[row] = action
+        self.hits += len(keys) - len(missed)
+        self.misses += len(missed)
+
+        if missed:
+            actions[missed] = predict(observations[missed])
+            for row in missed:
+                self.entries[keys[row]] = int(actions[row])
+                if len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+        return actions
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def disagreement(predict, step, size=4096, n_steps=20_000, seed=0):
+    """
+    Play EyeBallEnv with the uncached policy and ask a cache at every step.
+    Returns (fraction of steps where the cached action differs, cache hit rate).
+    """
+    parent_dir = str(Path(__file__).parent.absolute())
+    if parent_dir not in sys.path:
+        sys.path.append(parent_dir)
+    from eyeball_env import EyeBallEnv
+
+    cache = ActionCache(step, size)
+    env = EyeBallEnv(headless=True)
+    obs, _ = env.reset(seed=seed)
+    differ = 0
+    for _ in range(n_steps):
+        observation = obs.reshape(1, -1)
+        action = predict(observation)[0]
+        differ += cache.actions(observation, predict)[0] != action
+        obs, _, done, _, _ = env.step(int(action))
+        if done:
+            obs, _ = env.reset()
+    return differ / n_steps, cache.hit_rate
+
+
+def main():
+    parent_dir = Path(__file__).parent.absolute()
+    src_dir = str(parent_dir.parent)
+    if src_dir not in sys.path:
+        sys.path.append(src_dir)
+    from rl.ai_controller import AIController
+
+    parser = argparse.ArgumentParser(description="How often cached AI actions differ from the policy's")
+    parser.add_argument("--steps", type=float, nargs="+", default=[0.1, 0.25, 0.5, 1.0], help="quantization steps")
+    parser.add_argument("--size", type=int, default=4096, help="cache entries")
+    parser.add_argument("--n-steps", type=int, default=20_000, help="env steps per quantization step")
+    parser.add_argument("--model", default=f"{parent_dir}/models/best/best_model")
+    parser.add_argument("--stats", default=f"{parent_dir}/models/vec_normalize.pkl")
+    parser.add_argument("--policy", default=f"{parent_dir}/models/best/best_policy.npz")
+    args = parser.parse_args()
+
+    controller = AIController(str(parent_dir), args.model, args.stats, policy_path=args.policy)
+    if controller.ai_model is None:
+        sys.exit(1)
+
+    print(f"{'step':>6} {'hit rate':>9} {'disagreement':>13}")
+    for step in args.steps:
+        differ, hit_rate = disagreement(controller.predict, step, args.size, args.n_steps)
+        print(f"{step:6g} {hit_rate:9.2%} {differ:13.3%}")
+
+
+if __name__ == "__main__":
+    main()
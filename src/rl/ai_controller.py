@@ -1,107 +1,143 @@
-import numpy as np
+import os
 import sys
 from pathlib import Path
 
+from instrumentation import instruments
+from rl.action_cache import ActionCache
+from rl.observation import ObservationBuilder, EntityObstacles
+
+
+def apply_lane_action(action, ai_player, lanes):
+    # lane movements
+    if action == 1 and ai_player.lane_index > 0:  # Move left
+        ai_player.switch_lane(ai_player.lane_index - 1)
+    # Move right
+    elif action == 2 and ai_player.lane_index < len(lanes) - 1:
+        ai_player.switch_lane(ai_player.lane_index + 1)
+
 
 class AIController:
-    def __init__(self, rl_dir, model_path, stats_path):
+    def __init__(self, rl_dir, model_path, stats_path, decision_interval=0.1, policy_path=None,
+                 normalizer_path=None, action_cache_step=None, action_cache_size=4096, load=True):
+        """
+        decision_interval: seconds between decisions, frame_skip * dt of the env the agent was trained in
+        policy_path: NumPy export of the model (see numpy_policy.py), used instead of the SB3 model if it exists
+        normalizer_path: stats exported by normalization.py (default: stats_path with .npz), the
+            VecNormalize pickle at stats_path is only loaded when this file is missing
+        action_cache_step: skip inference for observations that round to a recently decided one
+            at this step (see action_cache.py), None disables the cache
+        load: load the agent right away, pass False to call load_rl_agent later (e.g. on a background thread)
+        """
         self.rl_dir = rl_dir
         self.model_path = model_path
         self.stats_path = stats_path
+        self.policy_path = policy_path
+        self.normalizer_path = normalizer_path or str(Path(stats_path).with_suffix(".npz"))
         self.ai_model = None
         self.ai_stats = None
         self.ai_action = 0
         self.ai_action_cooldown = 0
+        self.decision_interval = decision_interval
+        self.obstacle_view = EntityObstacles()
+        self.observation_builder = None  # built for the lanes of the first observation
+        self.observation_lanes = None
+        self.action_cache = ActionCache(action_cache_step, action_cache_size) if action_cache_step else None
 
-        self.load_rl_agent()
+        if load:
+            self.load_rl_agent()
 
     def load_rl_agent(self):
-        """Load the reinforcement learning agent if available"""
+        """
+        Load the reinforcement learning agent if available.
+        ai_model is assigned last, so process_action only starts deciding once everything is loaded.
+        """
         try:
             if self.rl_dir not in sys.path:
                 sys.path.append(self.rl_dir)
 
-            from stable_baselines3 import PPO
-            from stable_baselines3.common.vec_env import VecNormalize, DummyVecEnv
-            from rl.eyeball_env import EyeBallEnv
-
-            dummy_env = DummyVecEnv([lambda: EyeBallEnv(headless=True)])
-
-            try:
-                self.ai_stats = VecNormalize.load(self.stats_path, dummy_env)
+            if os.path.exists(self.normalizer_path):
+                from rl.normalization import ObsNormalizer
+                self.ai_stats = ObsNormalizer.load(self.normalizer_path)
                 print("RL agent normalization stats loaded.")
-            except FileNotFoundError:
-                print("Warning: Could not load RL normalization stats. Using unnormalized environment.")
-                self.ai_stats = None
-
-            self.ai_model = PPO.load(self.model_path)
-            print("RL agent loaded successfully!")
+            else:
+                self.ai_stats = self.load_pickled_stats()
+
+            if self.policy_path and os.path.exists(self.policy_path):
+                from rl.numpy_policy import NumpyPolicy
+                self.ai_model = NumpyPolicy.load(self.policy_path)
+                print("RL agent loaded successfully (NumPy policy)!")
+            else:
+                from stable_baselines3 import PPO
+                self.ai_model = PPO.load(self.model_path)
+                print("RL agent loaded successfully!")
             return True
 
         except Exception as e:
             print(f"Failed to load RL agent: {e}")
             return False
 
+    def load_pickled_stats(self):
+        """Fallback for stats that were not exported, VecNormalize needs an env to load into"""
+        from stable_baselines3.common.vec_env import VecNormalize, DummyVecEnv
+        from rl.eyeball_env import EyeBallEnv
+
+        dummy_env = DummyVecEnv([lambda: EyeBallEnv(headless=True)])
+
+        try:
+            stats = VecNormalize.load(self.stats_path, dummy_env)
+            print("RL agent normalization stats loaded.")
+            return stats
+        except FileNotFoundError:
+            print("Warning: Could not load RL normalization stats. Using unnormalized environment.")
+            return None
+
     def get_observation(self, ai_player, obstacles, lanes, base_speed, level_speed, current_level):
-        """Create a normalized observation for the AI"""
-        obs = np.zeros(10, dtype=np.float32)
-
-        obs[0] = ai_player.lane_index  # Lane index (0, 1, 2)
-        obs[1] = ai_player.y           # Height
-        obs[2] = getattr(ai_player, 'y_velocity', 0)
-
-        # two nearest obstacles ahead
-        obstacles_ahead = sorted(
-            [o for o in obstacles if o.z > ai_player.z],
-            key=lambda o: o.z
-        )
-
-        # first obstacle info
-        if len(obstacles_ahead) > 0:
-            o1 = obstacles_ahead[0]
-            obs[3] = o1.z - ai_player.z  # Distance
-            obs[4] = lanes.index(o1.x) if o1.x in lanes else -1  # Lane
-            obs[5] = o1.scale[1]  # Height
-        else:
-            obs[3:6] = [100, -1, 0]
-
-        # second obstacle info
-        if len(obstacles_ahead) > 1:
-            o2 = obstacles_ahead[1]
-            obs[6] = o2.z - ai_player.z
-            obs[7] = lanes.index(o2.x) if o2.x in lanes else -1
-            obs[8] = o2.scale[1]
-        else:
-            obs[6:9] = [100, -1, 0]
+        """
+        The observation the agent was trained on (see rl/observation.py), written into a reused buffer
+        that the next call overwrites.
+        """
+        if self.observation_builder is None or self.observation_lanes != lanes:
+            self.observation_builder = ObservationBuilder(lanes)
+            self.observation_lanes = list(lanes)
+        self.obstacle_view.obstacles = obstacles
 
         current_speed = base_speed * level_speed[current_level]
-        obs[9] = current_speed
-
-        return obs
+        return self.observation_builder.build(
+            ai_player.lane_index, ai_player.y, getattr(ai_player, 'y_velocity', 0), ai_player.z,
+            current_speed, self.obstacle_view)
 
     def process_action(self, time_dt, ai_player, obstacles, lanes, base_speed, level_speed, current_level):
         if self.ai_action_cooldown <= 0 and self.ai_model:
-            observation = self.get_observation(
-                ai_player, obstacles, lanes, base_speed, level_speed, current_level).reshape(1, -1)
-
-            if self.ai_stats and hasattr(self.ai_stats, 'normalize_obs'):
-                observation = self.ai_stats.normalize_obs(observation)
-
-            self.ai_action, _ = self.ai_model.predict(
-                observation, deterministic=True)
-            self.ai_action = self.ai_action[0]
-
-            # lane movements
-            if self.ai_action == 1 and ai_player.lane_index > 0:  # Move left
-                ai_player.switch_lane(ai_player.lane_index - 1)
-                self.ai_action_cooldown = 0.3
-            # Move right
-            elif self.ai_action == 2 and ai_player.lane_index < len(lanes) - 1:
-                ai_player.switch_lane(ai_player.lane_index + 1)
-                self.ai_action_cooldown = 0.3
-
-            self.ai_action_cooldown = 0.1
+            with instruments.timer("ai.observation"):
+                observation = self.get_observation(
+                    ai_player, obstacles, lanes, base_speed, level_speed, current_level).reshape(1, -1)
+            self.ai_action = self.predict(observation)[0]
+            apply_lane_action(self.ai_action, ai_player, lanes)
+            instruments.count("ai.decisions")
+
+            self.ai_action_cooldown = self.decision_interval
         else:
             self.ai_action_cooldown -= time_dt
 
         return self.ai_action
+
+    def predict(self, observations):
+        """Deterministic actions for a matrix of raw observations, one row per agent"""
+        if self.action_cache is not None:
+            return self.action_cache.actions(observations, self._predict)
+        return self._predict(observations)
+
+    def _predict(self, observations):
+        if self.ai_stats and hasattr(self.ai_stats, 'normalize_obs'):
+            with instruments.timer("ai.normalize"):
+                observations = self.ai_stats.normalize_obs(observations)
+
+        with instruments.timer("ai.predict"):
+            actions, _ = self.ai_model.predict(observations, deterministic=True)
+        instruments.count("ai.forward_passes")
+        return actions
+
+    def report_cache(self):
+        if self.action_cache is not None:
+            cache = self.action_cache
+            print(f"AI action cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate:.1%} hit rate)")
@@ -0,0 +1,171 @@
+"""
+Several AI racers in one game.
+
+Racers playing the same model share one AIController, so each model is loaded
+once, and are decided together: every frame the observations of all racers whose
+cooldown ran out are stacked into one matrix and sent through one forward pass
+per distinct model. An extra opponent costs an observation row, not a predict call.
+"""
+
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+from instrumentation import instruments
+from rl.ai_controller import AIController, apply_lane_action
+from rl.decision_worker import DecisionWorker, summarize_latency, format_latency
+from rl.observation import ObservationBuilder, EntityObstacles, OBS_SIZE
+
+
+class AIRacer:
+    def __init__(self, name, player, controller):
+        self.name = name
+        self.player = player
+        self.controller = controller
+        self.obstacle_view = EntityObstacles()  # own cursor, racers are at different z
+        self.active = True
+        self.score = 0
+        self.action = 0
+        self.cooldown = 0
+
+    def reset(self):
+        self.active = True
+        self.score = 0
+        self.action = 0
+        self.cooldown = 0
+
+
+class AITeam:
+    def __init__(self, rl_dir, opponents, players, lanes, async_decisions=False, action_cache_step=None):
+        """
+        opponents: one dict per racer with model_path, stats_path and optionally policy_path and name,
+            racers with the same paths share one model
+        players: one Player entity per racer
+        async_decisions: run the batched inference on a worker thread per model (see decision_worker.py)
+        action_cache_step: memoize decisions per model on observations rounded to this step (see action_cache.py)
+        """
+        self.controllers = {}
+        self.racers = []
+        for idx, (opponent, player) in enumerate(zip(opponents, players)):
+            key = (opponent["model_path"], opponent["stats_path"], opponent.get("policy_path"))
+            if key not in self.controllers:
+                self.controllers[key] = AIController(rl_dir, *key[:2], policy_path=key[2],
+                                                     action_cache_step=action_cache_step, load=False)
+            self.racers.append(AIRacer(opponent.get("name", f"AI {idx + 1}"), player, self.controllers[key]))
+
+        self.lanes = list(lanes)
+        self.observation_builder = ObservationBuilder(lanes)
+        self.groups = [(controller, [racer for racer in self.racers if racer.controller is controller])
+                       for controller in self.controllers.values()]
+        # one preallocated observation matrix per model
+        self.batches = {id(controller): np.zeros((len(racers), OBS_SIZE), dtype=np.float32)
+                        for controller, racers in self.groups}
+
+        self.async_decisions = async_decisions
+        self.workers = {}   # id(controller) -> DecisionWorker
+        self.pending = {}   # id(controller) -> {seq: racers the posted rows belong to}
+        self.staleness = deque(maxlen=1000)
+        self.n_forward_passes = 0
+
+    def load(self):
+        """Load every distinct model, True if all loaded"""
+        return all([controller.load_rl_agent() for controller in self.controllers.values()])
+
+    def reset(self):
+        for racer in self.racers:
+            racer.reset()
+        # decisions still in flight were made for the previous game
+        for pending in self.pending.values():
+            pending.clear()
+
+    def decide(self, time_dt, obstacles, base_speed, level_speed, current_level):
+        """Decide for every active racer whose cooldown ran out, returns the current action of each racer"""
+        speed = base_speed * level_speed[current_level]
+
+        for controller, racers in self.groups:
+            if controller.ai_model is None:
+                continue
+
+            due = []
+            for racer in racers:
+                if not racer.active:
+                    continue
+                if racer.cooldown <= 0:
+                    due.append(racer)
+                    racer.cooldown = controller.decision_interval
+                else:
+                    racer.cooldown -= time_dt
+
+            if due:
+                batch = self.batches[id(controller)][:len(due)]
+                with instruments.timer("ai.observation"):
+                    for row, racer in zip(batch, due):
+                        racer.obstacle_view.obstacles = obstacles
+                        player = racer.player
+                        self.observation_builder.build(player.lane_index, player.y,
+                                                       getattr(player, 'y_velocity', 0), player.z, speed,
+                                                       racer.obstacle_view, out=row)
+
+                if self.async_decisions:
+                    self._post(controller, batch.copy(), due)
+                else:
+                    self._apply(due, controller.predict(batch))
+                    self.n_forward_passes += 1
+
+            if self.async_decisions:
+                self._collect(controller)
+
+        return [racer.action if racer.active else 0 for racer in self.racers]
+
+    def _apply(self, racers, actions):
+        for racer, action in zip(racers, actions):
+            if not racer.active:
+                continue
+            racer.action = int(action)
+            apply_lane_action(racer.action, racer.player, self.lanes)
+            instruments.count("ai.decisions")
+
+    def _post(self, controller, batch, racers):
+        key = id(controller)
+        if key not in self.workers:
+            self.workers[key] = DecisionWorker(controller.predict)
+            self.pending[key] = {}
+        seq = self.workers[key].post(batch)
+        self.pending[key][seq] = racers
+
+    def _collect(self, controller):
+        """Apply the worker's latest decision if it is new"""
+        key = id(controller)
+        worker = self.workers.get(key)
+        decision = worker.latest() if worker else None
+        if decision is None or decision.seq not in self.pending[key]:
+            return
+
+        pending = self.pending[key]
+        for seq in [seq for seq in pending if seq < decision.seq]:
+            # replaced in the mailbox before the worker got to it, decide for those racers again
+            for racer in pending.pop(seq):
+                racer.cooldown = 0
+        racers = pending.pop(decision.seq)
+        self.staleness.append(perf_counter() - decision.observed_at)
+        instruments.observe("ai.staleness", self.staleness[-1] * 1000)
+        self._apply(racers, decision.actions)
+        self.n_forward_passes += 1
+
+    def decision_latency(self):
+        if not self.workers:
+            return None
+        inference_times = [t for worker in self.workers.values() for t in worker.inference_times]
+        return summarize_latency(self.staleness, inference_times,
+                                 sum(worker.n_dropped for worker in self.workers.values()))
+
+    def close(self):
+        latency = self.decision_latency()
+        if latency:
+            print(f"AI decision latency: {format_latency(latency)}")
+        for controller in self.controllers.values():
+            controller.report_cache()
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers.clear()
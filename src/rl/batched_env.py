@@ -0,0 +1,414 @@
+"""
+Batched version of the headless EyeBallEnv for RL training.
+
+All player and obstacle state for N environments lives in structure-of-arrays
+NumPy buffers, so stepping, spawning, collisions, rewards and auto-resets are
+done for every env in one vectorized pass instead of one Python object per env.
+Implements the SB3 VecEnv interface, so it can be passed straight into PPO
+(wrap it in VecMonitor to get episode statistics in the logs).
+"""
+
+import numpy as np
+import sys
+from pathlib import Path
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+
+parent_dir = str(Path(__file__).parent.absolute())
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from eyeball_env import EyeBallEnv
+from rl.course import course_chunk, new_course_seed, CHUNK_ROWS, GAP, OPEN_LANE, FULL_ROW, EXTRA_ROW, LANE
+
+
+class BatchedEyeBallEnv(VecEnv):
+    def __init__(self, n_envs=256, max_rows=32, frame_skip=1, dt=0.1):
+        """frame_skip and dt work like in EyeBallEnv"""
+        # single env used as the source of truth for the game constants
+        template = EyeBallEnv(headless=True, frame_skip=frame_skip, dt=dt)
+
+        self.lanes = np.array(template.lanes, dtype=np.float64)
+        self.n_lanes = len(template.lanes)
+        self.base_speed = template.base_speed
+        self.gravity = template.gravity
+        self.ball_radius = template.ball_radius
+        self.jump_speed = template.jump_speed
+        self.obstacle_min_spacing = template.obstacle_min_spacing
+        self.level_length = template.level_length
+        self.max_level = template.max_level
+        self.dt = template.dt
+        self.frame_skip = template.frame_skip
+
+        # level -> speed multiplier lookup (index 0 unused)
+        self.level_speed = np.zeros(self.max_level + 1)
+        for level, speed in template.level_speed.items():
+            self.level_speed[level] = speed
+
+        # obstacle geometry, same values as headless_spawn_obstacle
+        self.obstacle_y = 0.5
+        self.obstacle_width = 1.5
+        self.obstacle_depth = 0.5
+        self.tall_height = 1.0
+        self.low_height = 0.6
+        self.spawn_horizon = 60
+        self.fixed_offset = 40
+        self.look_ahead_distance = 15
+        self.clean_distance = 10
+
+        # lanes a ball in lane i overlaps with along x
+        lane_dx = np.abs(self.lanes[:, None] - self.lanes[None, :])
+        self.lane_overlap = lane_dx < (self.obstacle_width / 2 + self.ball_radius)
+
+        self.render_mode = None
+        super().__init__(n_envs, template.observation_space, template.action_space)
+
+        self.max_rows = max_rows
+        self.env_rngs = [np.random.default_rng() for _ in range(n_envs)]
+        self.actions = np.zeros(n_envs, dtype=np.int64)
+
+        # player state
+        self.lane_index = np.ones(n_envs, dtype=np.int64)
+        self.y = np.zeros(n_envs)
+        self.y_velocity = np.zeros(n_envs)
+        self.z = np.zeros(n_envs)
+        self.jumping = np.zeros(n_envs, dtype=bool)
+        self.level = np.ones(n_envs, dtype=np.int64)
+        self.next_level_z = np.full(n_envs, float(self.level_length))
+        self.score = np.zeros(n_envs)
+        self.time_alive = np.zeros(n_envs)
+        self.last_obstacle_z = np.zeros(n_envs)
+
+        # obstacle rows, one ring buffer of max_rows per env, kept in spawn (= z) order
+        self.row_z = np.zeros((n_envs, max_rows))
+        self.row_lanes = np.zeros((n_envs, max_rows, self.n_lanes), dtype=bool)
+        self.row_height = np.zeros((n_envs, max_rows))
+        self.row_head = np.zeros(n_envs, dtype=np.int64)
+        self.row_count = np.zeros(n_envs, dtype=np.int64)
+
+        # per-env seeded obstacle course, same rows EyeBallEnv would spawn for that seed
+        self.course_seed = np.zeros(n_envs, dtype=np.int64)
+        self.course_cached = np.zeros(n_envs, dtype=bool)  # explicitly seeded, see course.py
+        self.course_chunk_index = np.zeros(n_envs, dtype=np.int64)
+        self.course_row = np.zeros(n_envs, dtype=np.int64)
+        self.course_rows = np.zeros((n_envs, CHUNK_ROWS, LANE + self.n_lanes))
+
+        # collision details, for the crash infos
+        self.hit_height = np.zeros(n_envs)
+        self.crash_height = np.zeros(n_envs)
+        self.crash_airborne = np.zeros(n_envs, dtype=bool)
+        self.crash_score = np.zeros(n_envs)
+        self.crash_level = np.zeros(n_envs, dtype=np.int64)
+
+        self._env_idx = np.arange(n_envs)
+        self._row_idx = np.arange(max_rows)
+        self._lane_idx = np.arange(self.n_lanes)
+
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool), self._seeds)
+        self._reset_seeds()
+        self._reset_options()
+        return self._get_observations()
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        rewards, hit = self._physics_step(self.actions)
+        obs = self._get_observations()
+        if hit.any():
+            self._record_crashes(hit)
+
+        no_action = np.zeros(self.num_envs, dtype=np.int64)
+        for _ in range(self.frame_skip - 1):
+            if hit.all():
+                break
+            # envs that already crashed keep simulating, but their reward and obs are frozen
+            sub_rewards, sub_hit = self._physics_step(no_action)
+            rewards += np.where(hit, 0, sub_rewards).astype(np.float32)
+            alive = ~hit
+            obs[alive] = self._get_observations()[alive]
+            new_hit = sub_hit & alive
+            if new_hit.any():
+                self._record_crashes(new_hit)
+            hit |= new_hit
+
+        infos = [{"TimeLimit.truncated": False} for _ in range(self.num_envs)]
+        if hit.any():
+            for env_idx in np.flatnonzero(hit):
+                infos[env_idx]["terminal_observation"] = obs[env_idx].copy()
+                infos[env_idx].update(
+                    crashed_into="low_barrier" if self.crash_height[env_idx] < 1 else "block",
+                    airborne=bool(self.crash_airborne[env_idx]),
+                    score=float(self.crash_score[env_idx]),
+                    level=int(self.crash_level[env_idx]),
+                )
+            self._reset_envs(hit)
+            obs[hit] = self._get_observations()[hit]
+
+        return obs, rewards, hit, infos
+
+    def _record_crashes(self, mask):
+        """Keep what envs in mask ran into and how far they got, see EyeBallEnv._crash_info"""
+        self.crash_height[mask] = self.hit_height[mask]
+        self.crash_airborne[mask] = self.jumping[mask]
+        self.crash_score[mask] = self.score[mask]
+        self.crash_level[mask] = self.level[mask]
+
+    def _physics_step(self, actions):
+        """Advance every env by dt, returns (rewards, hit)"""
+        previous_lane = self.lane_index.copy()
+        self._process_actions(actions)
+
+        current_speed = self.base_speed * self.level_speed[self.level]
+        self.z += current_speed * self.dt
+        self.time_alive += self.dt
+        self.score += self.dt
+
+        self._handle_jumping()
+        self._check_progression()
+        self._ensure_obstacles_ahead()
+
+        hit = self._check_collisions()
+        rewards = 0.5 * self.dt * self.level_speed[self.level]
+
+        # lane change reward/penalty
+        changed = (self.lane_index != previous_lane) & ~hit
+        if changed.any():
+            rewards = rewards + self._lane_change_rewards(previous_lane) * changed
+        rewards = np.where(hit, -40.0, rewards).astype(np.float32)
+
+        self._clean_obstacles()
+        return rewards, hit
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        value = getattr(self, attr_name)
+        return [value for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    def get_images(self):
+        return [None for _ in range(self.num_envs)]
+
+    def _reset_envs(self, mask, seeds=None):
+        for env_idx in np.flatnonzero(mask):
+            seed = seeds[env_idx] if seeds is not None else None
+            if seed is not None:
+                self.env_rngs[env_idx] = np.random.default_rng(seed)
+                self.course_seed[env_idx] = seed
+            else:
+                self.course_seed[env_idx] = new_course_seed(self.env_rngs[env_idx])
+            self.course_cached[env_idx] = seed is not None
+            self._load_course_chunk(env_idx, 0)
+
+        self.lane_index[mask] = 1
+        self.y[mask] = 0
+        self.y_velocity[mask] = 0
+        self.z[mask] = 0
+        self.jumping[mask] = False
+        self.level[mask] = 1
+        self.next_level_z[mask] = self.level_length
+        self.score[mask] = 0
+        self.time_alive[mask] = 0
+        self.last_obstacle_z[mask] = 0
+        self.row_head[mask] = 0
+        self.row_count[mask] = 0
+
+        self._spawn_ahead(mask)
+
+    def _process_actions(self, actions):
+        left = (actions == 1) & (self.lane_index > 0)
+        right = (actions == 2) & (self.lane_index < self.n_lanes - 1)
+        jump = (actions == 3) & (self.y <= 0.01) & ~self.jumping
+
+        self.lane_index -= left
+        self.lane_index += right
+        self.jumping |= jump
+        self.y_velocity[jump] = self.jump_speed
+
+    def _handle_jumping(self):
+        jumping = self.jumping
+        self.y[jumping] += self.y_velocity[jumping] * self.dt
+        self.y_velocity[jumping] -= self.gravity * self.dt
+
+        landed = jumping & (self.y <= 0) & (self.y_velocity < 0)
+        self.y[landed] = 0
+        self.y_velocity[landed] = 0
+        self.jumping[landed] = False
+        np.maximum(self.y, 0, out=self.y)
+
+    def _check_progression(self):
+        progress = (self.z >= self.next_level_z) & (self.level < self.max_level)
+        self.level += progress
+        self.next_level_z[progress] += self.level_length
+
+    def _ensure_obstacles_ahead(self):
+        needs_spawn = (self.row_count == 0) | (self.last_obstacle_z < self.z + self.spawn_horizon)
+        if needs_spawn.any():
+            self._spawn_ahead(needs_spawn)
+
+    def _load_course_chunk(self, env_idx, chunk_index):
+        self.course_chunk_index[env_idx] = chunk_index
+        self.course_rows[env_idx] = course_chunk(
+            int(self.course_seed[env_idx]), chunk_index, self.n_lanes, self.obstacle_min_spacing,
+            bool(self.course_cached[env_idx]))
+        self.course_row[env_idx] = 0
+
+    def _next_course_rows(self, env_idx):
+        rows = self.course_rows[env_idx, self.course_row[env_idx]]
+        self.course_row[env_idx] += 1
+        for exhausted in env_idx[self.course_row[env_idx] == CHUNK_ROWS]:
+            self._load_course_chunk(exhausted, self.course_chunk_index[exhausted] + 1)
+        return rows
+
+    def _spawn_ahead(self, mask):
+        env_idx = np.flatnonzero(mask)
+        spacing = self.obstacle_min_spacing
+
+        rows = self._next_course_rows(env_idx)
+        next_spawn_z = np.maximum(
+            self.z[env_idx] + self.fixed_offset,
+            self.last_obstacle_z[env_idx] + spacing + rows[:, GAP]
+        )
+        self._spawn_rows(env_idx, next_spawn_z, rows)
+
+        extra = rows[:, EXTRA_ROW] < 0.1
+        if extra.any():
+            extra_idx = env_idx[extra]
+            extra_rows = self._next_course_rows(extra_idx)
+            extra_spawn_z = next_spawn_z[extra] + spacing + extra_rows[:, GAP]
+            self._spawn_rows(extra_idx, extra_spawn_z, extra_rows)
+            next_spawn_z[extra] = extra_spawn_z
+
+        self.last_obstacle_z[env_idx] = next_spawn_z
+
+    def _spawn_rows(self, env_idx, row_z, rows):
+        """Vectorized headless_spawn_obstacle: one obstacle row for each env in env_idx"""
+        level = self.level[env_idx]
+
+        open_lane = rows[:, OPEN_LANE].astype(np.int64)
+        full_row = (level >= 1) & (rows[:, FULL_ROW] < 0.2)
+        spawn_probability = 0.5 + (level - 1) * 0.1
+        lanes = rows[:, LANE:] < spawn_probability[:, None]
+        lanes &= self._lane_idx[None, :] != open_lane[:, None]
+        lanes |= full_row[:, None]
+
+        # rows where every lane came up empty spawn nothing
+        keep = lanes.any(axis=1)
+        env_idx = env_idx[keep]
+        if len(env_idx) == 0:
+            return
+
+        # checked before writing, a full ring buffer would overwrite its oldest (nearest) row
+        if (self.row_count[env_idx] >= self.max_rows).any():
+            raise RuntimeError(f"obstacle row buffer overflow, increase max_rows (currently {self.max_rows})")
+        slot = (self.row_head[env_idx] + self.row_count[env_idx]) % self.max_rows
+        self.row_z[env_idx, slot] = row_z[keep]
+        self.row_lanes[env_idx, slot] = lanes[keep]
+        self.row_height[env_idx, slot] = np.where(full_row[keep], self.low_height, self.tall_height)
+        self.row_count[env_idx] += 1
+
+    def _live_rows(self):
+        """Mask over physical row slots that currently hold an obstacle row"""
+        offset = (self._row_idx[None, :] - self.row_head[:, None]) % self.max_rows
+        return offset < self.row_count[:, None]
+
+    def _check_collisions(self):
+        live = self._live_rows()
+        dz = np.abs(self.row_z - self.z[:, None])
+        z_overlap = live & (dz < self.obstacle_depth / 2 + self.ball_radius)
+        if not z_overlap.any():
+            return np.zeros(self.num_envs, dtype=bool)
+
+        # any occupied lane of the row overlapping the ball along x
+        x_lanes = self.lane_overlap[self.lane_index]
+        x_overlap = (self.row_lanes & x_lanes[:, None, :]).any(axis=2)
+
+        player_bottom = (self.y - self.ball_radius)[:, None]
+        player_top = (self.y + self.ball_radius)[:, None]
+        obstacle_bottom = self.obstacle_y - self.row_height / 2
+        obstacle_top = self.obstacle_y + self.row_height / 2
+        y_overlap = (player_bottom < obstacle_top) & (player_top > obstacle_bottom)
+
+        hits = z_overlap & x_overlap & y_overlap
+        self.hit_height = np.where(hits, self.row_height, 0).max(axis=1)
+        return hits.any(axis=1)
+
+    def _lane_change_rewards(self, previous_lane):
+        live = self._live_rows()
+        dz = self.row_z - self.z[:, None]
+        in_range = live & (dz > 0) & (dz < self.look_ahead_distance)
+
+        env_idx = self._env_idx[:, None]
+        has_obstacle_current = (in_range & self.row_lanes[env_idx, self._row_idx, self.lane_index[:, None]]).any(axis=1)
+        has_obstacle_previous = (in_range & self.row_lanes[env_idx, self._row_idx, previous_lane[:, None]]).any(axis=1)
+
+        rewards = np.zeros(self.num_envs)
+        rewards[has_obstacle_previous & ~has_obstacle_current] = 5.0
+        rewards[~has_obstacle_previous & has_obstacle_current] = -5.0
+        return rewards
+
+    def _clean_obstacles(self):
+        min_z = self.z - self.clean_distance
+        while True:
+            head_z = self.row_z[self._env_idx, self.row_head]
+            expired = (self.row_count > 0) & (head_z <= min_z)
+            if not expired.any():
+                break
+            self.row_head[expired] = (self.row_head[expired] + 1) % self.max_rows
+            self.row_count[expired] -= 1
+
+    def _get_observations(self):
+        """Same 10-dimensional observation as EyeBallEnv._get_observation, for every env"""
+        obs = np.zeros((self.num_envs, 10), dtype=np.float32)
+        obs[:, 0] = self.lane_index
+        obs[:, 1] = self.y
+        obs[:, 2] = self.y_velocity
+        obs[:, 3:9] = [100, -1, 0, 100, -1, 0]
+        obs[:, 9] = self.base_speed * self.level_speed[self.level]
+
+        # rows in z order, first row ahead of the ball
+        order = (self.row_head[:, None] + self._row_idx[None, :]) % self.max_rows
+        row_z = np.take_along_axis(self.row_z, order, axis=1)
+        ahead = (self._row_idx[None, :] < self.row_count[:, None]) & (row_z > self.z[:, None])
+        has_first = ahead.any(axis=1)
+        first = np.argmax(ahead, axis=1)
+        second = first + 1
+        has_next_row = has_first & (second < self.row_count)
+
+        first_slot = order[self._env_idx, first]
+        next_slot = order[self._env_idx, np.minimum(second, self.max_rows - 1)]
+        first_lanes = self.row_lanes[self._env_idx, first_slot]
+        next_lanes = self.row_lanes[self._env_idx, next_slot]
+
+        # nearest obstacle is the lowest occupied lane of the first row ahead
+        o1_lane = np.argmax(first_lanes, axis=1)
+        o1_dist = self.row_z[self._env_idx, first_slot] - self.z
+        o1_height = self.row_height[self._env_idx, first_slot]
+        obs[has_first, 3] = o1_dist[has_first]
+        obs[has_first, 4] = o1_lane[has_first]
+        obs[has_first, 5] = o1_height[has_first]
+
+        # second nearest is either another lane in the same row or the next row
+        same_row = first_lanes & (np.cumsum(first_lanes, axis=1) == 2)
+        in_same_row = has_first & same_row.any(axis=1)
+        in_next_row = ~in_same_row & has_next_row
+        obs[in_same_row, 6] = o1_dist[in_same_row]
+        obs[in_same_row, 7] = np.argmax(same_row, axis=1)[in_same_row]
+        obs[in_same_row, 8] = o1_height[in_same_row]
+        obs[in_next_row, 6] = (self.row_z[self._env_idx, next_slot] - self.z)[in_next_row]
+        obs[in_next_row, 7] = np.argmax(next_lanes, axis=1)[in_next_row]
+        obs[in_next_row, 8] = self.row_height[self._env_idx, next_slot][in_next_row]
+
+        return obs
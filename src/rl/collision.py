@@ -0,0 +1,121 @@
+"""
+Broad-phase collision queries for the headless simulator.
+
+CollisionIndex is an ObstacleStore that additionally buckets obstacles by lane.
+Each bucket is in z order with its own cursor on the first obstacle ahead of the
+player, so a collision test only looks at the few obstacles of the lanes the ball
+overlaps whose z range overlaps the ball, and "is there an obstacle in lane i
+within d ahead" is a single comparison.
+"""
+
+from rl.obstacle_store import ObstacleStore
+
+
+class Intersection:
+    __slots__ = ("hit",)
+
+    def __init__(self, hit):
+        self.hit = hit
+
+
+# shared results, so intersection tests never allocate
+HIT = Intersection(True)
+MISS = Intersection(False)
+
+
+class CollisionIndex(ObstacleStore):
+    def __init__(self, lanes, capacity=64):
+        self.lanes = list(lanes)
+        self.lane_lookup = {lane: idx for idx, lane in enumerate(self.lanes)}
+        # store indices per lane, in z order
+        self.buckets = [[] for _ in self.lanes]
+        self.max_width = 0.0
+        super().__init__(capacity)
+
+    def clear(self):
+        super().clear()
+        for bucket in self.buckets:
+            bucket.clear()
+        self.bucket_head = [0 for _ in self.lanes]
+        self.bucket_cursor = [0 for _ in self.lanes]
+        self.hit_slot = -1  # slot of the obstacle found by the last successful hit()
+
+    def push(self, x, y, z, width, height, depth):
+        super().push(x, y, z, width, height, depth)
+        self.buckets[self._lane_of(x)].append(self.tail - 1)
+        if width > self.max_width:
+            self.max_width = width
+
+    def _lane_of(self, x):
+        lane = self.lane_lookup.get(x)
+        if lane is None:
+            lane = min(range(len(self.lanes)), key=lambda i: abs(self.lanes[i] - x))
+        return lane
+
+    def expire(self, min_z):
+        super().expire(min_z)
+        for lane, bucket in enumerate(self.buckets):
+            head = self.bucket_head[lane]
+            while head < len(bucket) and bucket[head] < self.head:
+                head += 1
+            # drop expired entries in batches to keep the lists short
+            if head > 256:
+                del bucket[:head]
+                self.bucket_cursor[lane] = max(0, self.bucket_cursor[lane] - head)
+                head = 0
+            self.bucket_head[lane] = head
+
+    def _lane_cursor(self, lane, player_z):
+        """Position in the lane bucket of the first obstacle with z > player_z"""
+        bucket = self.buckets[lane]
+        cursor = max(self.bucket_cursor[lane], self.bucket_head[lane])
+        z, capacity = self.z, self.capacity
+        while cursor < len(bucket) and z[bucket[cursor] % capacity] <= player_z:
+            cursor += 1
+        self.bucket_cursor[lane] = cursor
+        return cursor
+
+    def obstacle_within(self, lane, player_z, distance):
+        """Is there an obstacle in lane with 0 < z - player_z < distance"""
+        bucket = self.buckets[lane]
+        cursor = self._lane_cursor(lane, player_z)
+        return cursor < len(bucket) and self.z[bucket[cursor] % self.capacity] - player_z < distance
+
+    def hit(self, x, y, z, radius):
+        """Does a ball at (x, y, z) overlap any obstacle's bounding box"""
+        x_reach = self.max_width / 2 + radius
+        z_reach = self.max_depth / 2 + radius
+
+        for lane, lane_x in enumerate(self.lanes):
+            if abs(lane_x - x) >= x_reach:
+                continue
+
+            bucket = self.buckets[lane]
+            head = self.bucket_head[lane]
+            cursor = self._lane_cursor(lane, z)
+
+            # obstacles just behind the ball
+            i = cursor - 1
+            while i >= head and z - self.z[bucket[i] % self.capacity] < z_reach:
+                if self._overlaps(bucket[i] % self.capacity, x, y, z, radius):
+                    self.hit_slot = bucket[i] % self.capacity
+                    return True
+                i -= 1
+
+            # obstacles just ahead of the ball
+            i = cursor
+            while i < len(bucket) and self.z[bucket[i] % self.capacity] - z < z_reach:
+                if self._overlaps(bucket[i] % self.capacity, x, y, z, radius):
+                    self.hit_slot = bucket[i] % self.capacity
+                    return True
+                i += 1
+        return False
+
+    def _overlaps(self, slot, x, y, z, radius):
+        if abs(self.z[slot] - z) >= self.depth[slot]/2 + radius:
+            return False
+        if abs(self.x[slot] - x) >= self.width[slot]/2 + radius:
+            return False
+        obstacle_bottom = self.y[slot] - self.height[slot]/2
+        obstacle_top = self.y[slot] + self.height[slot]/2
+        return (y - radius < obstacle_top) and (y + radius > obstacle_bottom)
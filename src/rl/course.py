@@ -0,0 +1,80 @@
+"""
+Seeded obstacle courses for the headless simulator.
+
+A course is an endless stream of obstacle rows. Each row holds every random
+number needed to spawn it (spacing gap, open lane, full-row roll, extra-row roll
+and one spawn roll per lane), generated in chunks of CHUNK_ROWS rows with one
+vectorized draw per chunk. Chunks only depend on (seed, chunk index), so the
+same course can be replayed exactly across episodes. Only courses that are
+replayed on purpose (an explicitly passed seed) are cached: during training every
+episode draws a fresh seed, and caching those chunks would only fill memory in
+every worker process.
+"""
+
+import numpy as np
+from collections import OrderedDict
+
+
+CHUNK_ROWS = 256
+CACHE_SIZE = 256  # nr of chunks kept in memory, ~3.7 MB per process with 3 lanes
+
+# columns of a course row
+GAP = 0        # extra spacing added to obstacle_min_spacing, int in [0, min_spacing]
+OPEN_LANE = 1  # lane kept free, int in [0, n_lanes)
+FULL_ROW = 2   # roll for a jump row blocking all lanes
+EXTRA_ROW = 3  # roll for spawning a second row right after this one
+LANE = 4       # first of n_lanes spawn rolls, one per lane
+
+_chunk_cache = OrderedDict()
+
+
+def course_chunk(seed, chunk_index, n_lanes, min_spacing, cache=True):
+    """Rows [chunk_index * CHUNK_ROWS, (chunk_index + 1) * CHUNK_ROWS) of course `seed`"""
+    key = (seed, chunk_index, n_lanes, min_spacing)
+    chunk = _chunk_cache.get(key)
+    if chunk is not None:
+        _chunk_cache.move_to_end(key)
+        return chunk
+
+    rng = np.random.default_rng([seed, chunk_index])
+    chunk = np.empty((CHUNK_ROWS, LANE + n_lanes))
+    chunk[:, GAP] = rng.integers(0, min_spacing + 1, CHUNK_ROWS)
+    chunk[:, OPEN_LANE] = rng.integers(0, n_lanes, CHUNK_ROWS)
+    chunk[:, FULL_ROW:] = rng.random((CHUNK_ROWS, LANE - FULL_ROW + n_lanes))
+    chunk.flags.writeable = False
+
+    if not cache:
+        return chunk
+    _chunk_cache[key] = chunk
+    if len(_chunk_cache) > CACHE_SIZE:
+        _chunk_cache.popitem(last=False)
+    return chunk
+
+
+def new_course_seed(np_random):
+    return int(np_random.integers(0, 2**63))
+
+
+class Course:
+    """Sequential reader over the rows of one seeded course"""
+
+    def __init__(self, seed, n_lanes, min_spacing, cache=True):
+        """cache: keep the chunks for replaying this course, False for one-off seeds"""
+        self.seed = seed
+        self.n_lanes = n_lanes
+        self.min_spacing = min_spacing
+        self.cache = cache
+        self._load(0)
+
+    def _load(self, chunk_index):
+        self.chunk_index = chunk_index
+        # python floats are faster than numpy scalars for the per-row spawn logic
+        self.rows = course_chunk(self.seed, chunk_index, self.n_lanes, self.min_spacing, self.cache).tolist()
+        self.row = 0
+
+    def next_row(self):
+        if self.row == CHUNK_ROWS:
+            self._load(self.chunk_index + 1)
+        row = self.rows[self.row]
+        self.row += 1
+        return row
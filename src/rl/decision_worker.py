@@ -0,0 +1,102 @@
+"""
+Policy inference off the game thread.
+
+The game thread posts its latest observation into a single-slot mailbox, a newer
+observation replaces one the worker has not picked up yet, and reads the most
+recent decision without ever waiting on inference.
+"""
+
+import threading
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+
+class Decision:
+    __slots__ = ("actions", "seq", "observed_at", "decided_at")
+
+    def __init__(self, actions, seq, observed_at, decided_at):
+        self.actions = actions          # one action per posted observation row
+        self.seq = seq                  # sequence number of the observation it was made for
+        self.observed_at = observed_at  # perf_counter() when the observation was posted
+        self.decided_at = decided_at
+
+
+class DecisionWorker:
+    def __init__(self, predict, history=1000):
+        self.predict = predict  # actions for a matrix of raw observations, e.g. AIController.predict
+        self.condition = threading.Condition()
+        self.mailbox = None   # (seq, observed_at, observation) waiting for the worker
+        self.decision = None  # latest Decision, replaced as a whole so reads need no lock
+        self.seq = 0
+        self.n_posted = 0
+        self.n_dropped = 0    # observations replaced before the worker got to them
+        self.n_decided = 0
+        self.inference_times = deque(maxlen=history)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def post(self, observation):
+        """
+        Hand the latest observation (or a matrix of them, one row per agent) to the worker,
+        never blocks on inference. Returns its sequence number.
+        """
+        with self.condition:
+            self.seq += 1
+            if self.mailbox is not None:
+                self.n_dropped += 1
+            self.mailbox = (self.seq, perf_counter(), observation)
+            self.n_posted += 1
+            self.condition.notify()
+        return self.seq
+
+    def latest(self):
+        """Most recent Decision, or None before the first one"""
+        return self.decision
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.mailbox is None and self.running:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                seq, observed_at, observation = self.mailbox
+                self.mailbox = None
+
+            started = perf_counter()
+            actions = self.predict(np.atleast_2d(observation))
+            decided_at = perf_counter()
+
+            self.inference_times.append(decided_at - started)
+            self.n_decided += 1
+            self.decision = Decision(np.asarray(actions).reshape(-1), seq, observed_at, decided_at)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join(timeout=1)
+
+
+def summarize_latency(staleness, inference_times, n_dropped):
+    """Staleness of applied actions and inference time, in ms"""
+    if not staleness:
+        return None
+    staleness = np.array(staleness) * 1000
+    inference = np.array(inference_times) * 1000
+    return {
+        "applied": len(staleness),
+        "staleness_mean_ms": float(staleness.mean()),
+        "staleness_p50_ms": float(np.percentile(staleness, 50)),
+        "staleness_p95_ms": float(np.percentile(staleness, 95)),
+        "inference_mean_ms": float(inference.mean()) if len(inference) else 0.0,
+        "dropped_observations": n_dropped,
+    }
+
+
+def format_latency(latency):
+    return ", ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                     for key, value in latency.items())
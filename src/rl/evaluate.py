@@ -0,0 +1,191 @@
+"""
+Offline evaluation of trained checkpoints over many seeded episodes.
+
+    python src/rl/evaluate.py src/rl/models/checkpoints --episodes 2000 --workers 16
+
+Every checkpoint plays the same seed set (episode i uses EyeBallEnv seed `seed + i`,
+simulated with BatchedEyeBallEnv, which replays exactly the same courses) and is
+reported with score, level reached and crash cause distributions. Per-episode
+results are cached by (checkpoint + stats hash, seed set, env settings) in
+eval_cache/, so ranking again or adding a checkpoint only simulates what is new.
+"""
+
+import sys
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import re
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+parent_dir = str(Path(__file__).parent.absolute())
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+cache_dir = f"{parent_dir}/eval_cache"
+
+
+def find_stats(checkpoint_path):
+    """VecNormalize stats belonging to a checkpoint, or None"""
+    path = Path(checkpoint_path)
+    match = re.match(r"(.*)_(\d+)_steps$", path.stem)
+    candidates = []
+    if match:
+        candidates.append(path.parent / f"{match.group(1)}_vecnormalize_{match.group(2)}_steps.pkl")
+    candidates += [path.parent / "vec_normalize.pkl", path.parent.parent / "vec_normalize.pkl"]
+    for candidate in candidates:
+        if candidate.exists():
+            return str(candidate)
+    return None
+
+
+def file_hash(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        if path:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+def evaluate_seeds(checkpoint_path, stats_path, first_seed, n_episodes, frame_skip, dt, max_steps):
+    """Play episodes with seeds first_seed .. first_seed + n_episodes - 1, one batched env per episode"""
+    import torch
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import VecNormalize
+    from batched_env import BatchedEyeBallEnv
+
+    torch.set_num_threads(1)
+    env = BatchedEyeBallEnv(n_envs=n_episodes, frame_skip=frame_skip, dt=dt)
+    model = PPO.load(checkpoint_path, device="cpu")
+    stats = None
+    if stats_path:
+        stats = VecNormalize.load(stats_path, env)
+        stats.training = False
+
+    env.seed(first_seed)
+    obs = env.reset()
+    episodes = [None] * n_episodes
+    rewards = np.zeros(n_episodes)
+    steps = np.zeros(n_episodes, dtype=np.int64)
+    active = np.ones(n_episodes, dtype=bool)
+
+    # envs keep running after their episode ends, only the first episode of each counts
+    while active.any():
+        model_obs = stats.normalize_obs(obs) if stats else obs
+        actions, _ = model.predict(model_obs, deterministic=True)
+        obs, step_rewards, dones, infos = env.step(actions)
+        rewards += step_rewards * active
+        steps += active
+
+        for idx in np.flatnonzero(dones & active):
+            info = infos[idx]
+            cause = info["crashed_into"] + ("_airborne" if info["airborne"] else "")
+            episodes[idx] = {"seed": first_seed + int(idx), "score": info["score"], "level": info["level"],
+                             "reward": float(rewards[idx]), "steps": int(steps[idx]), "cause": cause}
+            active[idx] = False
+
+        for idx in np.flatnonzero(active & (steps >= max_steps)):
+            episodes[idx] = {"seed": first_seed + int(idx), "score": float(env.score[idx]),
+                             "level": int(env.level[idx]), "reward": float(rewards[idx]),
+                             "steps": int(steps[idx]), "cause": "timeout"}
+            active[idx] = False
+
+    env.close()
+    return episodes
+
+
+def evaluate_checkpoint(pool, checkpoint_path, stats_path, seed, n_episodes, frame_skip, dt, max_steps, chunk_size):
+    settings = {"seed": seed, "n_episodes": n_episodes, "frame_skip": frame_skip, "dt": dt, "max_steps": max_steps}
+    settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+    cache_path = f"{cache_dir}/{file_hash(checkpoint_path, stats_path)[:16]}_{settings_hash[:16]}.json"
+
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            return json.load(f)["episodes"], True
+
+    futures = [
+        pool.submit(evaluate_seeds, checkpoint_path, stats_path, first_seed,
+                    min(chunk_size, seed + n_episodes - first_seed), frame_skip, dt, max_steps)
+        for first_seed in range(seed, seed + n_episodes, chunk_size)
+    ]
+    episodes = [episode for future in futures for episode in future.result()]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path, "w") as f:
+        json.dump({"checkpoint": checkpoint_path, "stats": stats_path, "settings": settings, "episodes": episodes}, f)
+    return episodes, False
+
+
+def summarize(episodes):
+    scores = np.array([episode["score"] for episode in episodes])
+    levels, causes = {}, {}
+    for episode in episodes:
+        levels[episode["level"]] = levels.get(episode["level"], 0) + 1
+        causes[episode["cause"]] = causes.get(episode["cause"], 0) + 1
+    return {
+        "episodes": len(episodes),
+        "mean_score": float(scores.mean()),
+        "median_score": float(np.median(scores)),
+        "p10_score": float(np.percentile(scores, 10)),
+        "p90_score": float(np.percentile(scores, 90)),
+        "max_score": float(scores.max()),
+        "mean_reward": float(np.mean([episode["reward"] for episode in episodes])),
+        "levels": {str(level): levels[level] for level in sorted(levels)},
+        "causes": dict(sorted(causes.items(), key=lambda item: -item[1])),
+    }
+
+
+def collect_checkpoints(paths):
+    checkpoints = []
+    for path in paths:
+        if os.path.isdir(path):
+            checkpoints += sorted(str(p) for p in Path(path).glob("*.zip"))
+        else:
+            checkpoints.append(path)
+    return checkpoints
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate EyeBall checkpoints over many seeded episodes")
+    parser.add_argument("checkpoints", nargs="+", help="checkpoint .zip files or directories of them")
+    parser.add_argument("--stats", help="VecNormalize stats for all checkpoints (default: found next to each)")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="first seed of the seed set")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=64, help="episodes simulated together by one task")
+    parser.add_argument("--max-steps", type=int, default=20_000, help="episodes still alive after this count as timeout")
+    parser.add_argument("--frame-skip", type=int, default=1)
+    parser.add_argument("--dt", type=float, default=0.1)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = {}
+    with ProcessPoolExecutor(args.workers, mp_context=mp.get_context("spawn")) as pool:
+        for checkpoint in collect_checkpoints(args.checkpoints):
+            stats = args.stats or find_stats(checkpoint)
+            if stats is None:
+                print(f"Warning: no normalization stats found for {checkpoint}, evaluating unnormalized.")
+            episodes, cached = evaluate_checkpoint(pool, checkpoint, stats, args.seed, args.episodes,
+                                                   args.frame_skip, args.dt, args.max_steps, args.chunk_size)
+            report[checkpoint] = summarize(episodes)
+            print(f"{checkpoint}: mean score {report[checkpoint]['mean_score']:.1f}{' (cached)' if cached else ''}")
+
+    ranked = sorted(report.items(), key=lambda item: -item[1]["mean_score"])
+    print(f"\n{'checkpoint':<50} {'mean':>7} {'median':>7} {'p10':>7} {'max':>7}  levels / crash causes")
+    for checkpoint, summary in ranked:
+        name = checkpoint if len(checkpoint) <= 50 else "..." + checkpoint[-47:]
+        print(f"{name:<50} {summary['mean_score']:7.1f} {summary['median_score']:7.1f} "
+              f"{summary['p10_score']:7.1f} {summary['max_score']:7.1f}  {summary['levels']} {summary['causes']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
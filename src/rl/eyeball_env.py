@@ -15,6 +15,9 @@ if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 from utils import apply_gravity
+from rl.collision import CollisionIndex, HIT, MISS
+from rl.observation import ObservationBuilder, StoreObstacles, OBS_SIZE
+from rl.course import Course, new_course_seed, GAP, OPEN_LANE, FULL_ROW, EXTRA_ROW, LANE
 
 class HeadlessPlayer:
     def __init__(self, lanes):
@@ -48,8 +51,7 @@ class HeadlessPlayer:
         dz = abs(obstacle.position[2] - self.z)
         z_overlap = dz < (obstacle.scale[2]/2 + 0.25)
         
-        hit = x_overlap and y_overlap and z_overlap
-        return type('Intersection', (), {'hit': hit})
+        return HIT if x_overlap and y_overlap and z_overlap else MISS
 
 class HeadlessObstacle:
     def __init__(self, position, scale):
@@ -61,10 +63,11 @@ class HeadlessGameEnv:
         self.platform_scale = (10, 1, 3000)
         self.platform_position = (0, -1, 0)
 
-def headless_spawn_obstacle(z_pos, lanes, level, obstacles, spacing):
-    open_lane = random.randint(0, len(lanes)-1)
+def headless_spawn_obstacle(z_pos, lanes, level, obstacles, row):
+    """Spawn one obstacle row, taking all random rolls from a course row"""
+    open_lane = int(row[OPEN_LANE])
 
-    if level >= 1 and random.random() < 0.2:
+    if level >= 1 and row[FULL_ROW] < 0.2:
         for lane in lanes:
             position = (lane, 0.5, z_pos)
             scale = (1.5, 0.6, 0.5)
@@ -76,7 +79,7 @@ def headless_spawn_obstacle(z_pos, lanes, level, obstacles, spacing):
         if idx == open_lane:
             continue
         spawn_probability = 0.5 + (level - 1) * 0.1
-        if random.random() < spawn_probability:
+        if row[LANE + idx] < spawn_probability:
             position = (lane, 0.5, z_pos)
             scale = (1.5, 1, 0.5)
             obstacle = HeadlessObstacle(position, scale)
@@ -98,11 +101,19 @@ class HeadlessLevelManager:
         return False
 
 class EyeBallEnv(gym.Env):
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, frame_skip=1, dt=0.1):
+        """
+        frame_skip: physics sub-steps per agent decision. The action is applied on the
+            first sub-step, the rest are "do nothing" while the ball rolls on. Rewards are
+            summed over the sub-steps and collisions are checked on every one of them.
+        dt: physics time step in seconds. Keep dt * max speed below the obstacle depth
+            plus the ball diameter (1.0), else the ball can pass through obstacles.
+        """
         super(EyeBallEnv, self).__init__()
         
         # needed headless to train... 
         self.headless = headless
+        self.frame_skip = frame_skip
         
         self.previous_lane = 1
         
@@ -129,7 +140,10 @@ class EyeBallEnv(gym.Env):
         self.level_length = 300
         self.max_level = 5
         self.level_speed = {1: 1.0, 2: 1.2, 3: 1.4, 4: 1.6, 5: 1.8}
-        self.dt = 0.1  # 100ms per step in game
+        self.dt = dt  # 100ms per step in game by default
+        self.obstacles = CollisionIndex(self.lanes)
+        self.obstacle_view = StoreObstacles(self.obstacles)
+        self.observation_builder = ObservationBuilder(self.lanes)
         
         self.reset()
     
@@ -141,6 +155,11 @@ class EyeBallEnv(gym.Env):
     def reset(self, seed=None, options=None):
         if seed is not None:
             self.seed(seed)
+            self.course_seed = seed
+        else:
+            self.course_seed = new_course_seed(self.np_random)
+        # only an explicitly seeded course is likely to be played again
+        self.course = Course(self.course_seed, len(self.lanes), self.obstacle_min_spacing, cache=seed is not None)
 
         if self.headless:
             self.game_env = HeadlessGameEnv()
@@ -155,7 +174,7 @@ class EyeBallEnv(gym.Env):
             self.player = Player(self.lanes)
             self.level_manager = LevelManager(self.level_length, self.max_level, self.level_speed)
 
-        self.obstacles = []
+        self.obstacles.clear()
         self.last_obstacle_z = 0
         self.jumping = False
         self.score = 0
@@ -170,6 +189,26 @@ class EyeBallEnv(gym.Env):
         if self.done:
             return self._get_observation(), 0, True, False, {}
 
+        reward = self._physics_step(action)
+        for _ in range(self.frame_skip - 1):
+            if self.done:
+                break
+            reward += self._physics_step(0)
+
+        info = self._crash_info() if self.done else {}
+        return self._get_observation(), reward, self.done, False, info
+
+    def _crash_info(self):
+        """What the ball ran into and how far it got, for evaluating crash causes"""
+        height = self.obstacles.height[self.obstacles.hit_slot]
+        return {
+            "crashed_into": "low_barrier" if height < 1 else "block",
+            "airborne": self.jumping,
+            "score": self.score,
+            "level": self.level_manager.current_level,
+        }
+
+    def _physics_step(self, action):
         self.previous_lane = self.player.lane_index
         self._process_action(action)
 
@@ -195,21 +234,14 @@ class EyeBallEnv(gym.Env):
                 reward += lane_reward
 
         self._clean_obstacles()
-        return self._get_observation(), reward, self.done, False, {}
+        return reward
 
     def _calculate_lane_change_reward(self):
-        has_obstacle_current = False
-        has_obstacle_previous = False
-
         look_ahead_distance = 15
-
-        for obstacle in self.obstacles:
-            if 0 < obstacle.position[2] - self.player.z < look_ahead_distance:
-                if obstacle.position[0] == self.lanes[self.player.lane_index]:
-                    has_obstacle_current = True
-
-                if obstacle.position[0] == self.lanes[self.previous_lane]:
-                    has_obstacle_previous = True
+        has_obstacle_current = self.obstacles.obstacle_within(
+            self.player.lane_index, self.player.z, look_ahead_distance)
+        has_obstacle_previous = self.obstacles.obstacle_within(
+            self.previous_lane, self.player.z, look_ahead_distance)
 
         if has_obstacle_previous and not has_obstacle_current:
             return 5.0
@@ -243,21 +275,27 @@ class EyeBallEnv(gym.Env):
         fixed_offset = 40
         
         if not self.obstacles or (self.last_obstacle_z < self.player.z + spawn_horizon):
-            next_spawn_z = max(
-                self.player.z + fixed_offset,
-                self.last_obstacle_z + self.obstacle_min_spacing + random.randint(0, self.obstacle_min_spacing)
-            )
-
             if self.headless:
+                row = self.course.next_row()
+                next_spawn_z = max(
+                    self.player.z + fixed_offset,
+                    self.last_obstacle_z + self.obstacle_min_spacing + row[GAP]
+                )
                 headless_spawn_obstacle(next_spawn_z, self.lanes, self.level_manager.current_level, 
-                                        self.obstacles, self.obstacle_min_spacing)
+                                        self.obstacles, row)
 
-                if random.random() < 0.1:  
-                    extra_spawn_z = next_spawn_z + self.obstacle_min_spacing + random.randint(0, self.obstacle_min_spacing)
+                if row[EXTRA_ROW] < 0.1:
+                    extra_row = self.course.next_row()
+                    extra_spawn_z = next_spawn_z + self.obstacle_min_spacing + extra_row[GAP]
                     headless_spawn_obstacle(extra_spawn_z, self.lanes, self.level_manager.current_level, 
-                                          self.obstacles, self.obstacle_min_spacing)
+                                          self.obstacles, extra_row)
                     next_spawn_z = extra_spawn_z
             else:
+                next_spawn_z = max(
+                    self.player.z + fixed_offset,
+                    self.last_obstacle_z + self.obstacle_min_spacing + random.randint(0, self.obstacle_min_spacing)
+                )
+
                 from obstacle import spawn_obstacle_at
                 spawn_obstacle_at(next_spawn_z, self.lanes, self.level_manager.current_level, self.obstacles)
 
@@ -269,78 +307,17 @@ class EyeBallEnv(gym.Env):
             self.last_obstacle_z = next_spawn_z
 
     def _check_collisions(self):
-        for obstacle in self.obstacles:
-            if hasattr(self.player, 'intersects'):
-                if self.player.intersects(obstacle).hit:
-                    return True
-            else:
-                # X-axis (lane) collision
-                dx = abs(obstacle.position[0] - self.player.x)
-                x_overlap = dx < (obstacle.scale[0]/2 + self.ball_radius)
-                
-                # Y-axis (height) collision
-                player_bottom = self.player.y - self.ball_radius
-                player_top = self.player.y + self.ball_radius
-                obstacle_bottom = obstacle.position[1] - obstacle.scale[1]/2
-                obstacle_top = obstacle.position[1] + obstacle.scale[1]/2
-                y_overlap = (player_bottom < obstacle_top) and (player_top > obstacle_bottom)
-                
-                # Z-axis (depth) collision
-                dz = abs(obstacle.position[2] - self.player.z)
-                z_overlap = dz < (obstacle.scale[2]/2 + self.ball_radius)
-                
-                if x_overlap and y_overlap and z_overlap:
-                    return True
-        return False
+        return self.obstacles.hit(self.player.x, self.player.y, self.player.z, self.ball_radius)
         
     def _clean_obstacles(self):
-        self.obstacles = [obs for obs in self.obstacles if obs.position[2] > self.player.z - 10]
+        self.obstacles.expire(self.player.z - 10)
             
     def _get_observation(self):
-        """
-        The input to the agent is 10-dimensional vector representing the game state.
-        The vector includes:
-        - Player lane index (0, 1, 2)
-        - Player height
-        - Player Y velocity (for jumping)
-        - Distance to the nearest obstacle ahead
-        - Lane index of the nearest obstacle ahead
-        - Height of the nearest obstacle ahead
-        - Distance to the second nearest obstacle ahead
-        - Lane index of the second nearest obstacle ahead
-        - Height of the second nearest obstacle ahead
-        - Current game speed
-        """
-
-        obs = np.zeros(10, dtype=np.float32)
-        obs[0] = self.player.lane_index
-        obs[1] = self.player.y
-        obs[2] = getattr(self.player, 'y_velocity', 0)
+        """The 10-dimensional observation described in rl/observation.py"""
+        return self.observation_builder.build(
+            self.player.lane_index, self.player.y, getattr(self.player, 'y_velocity', 0), self.player.z,
+            self.base_speed * self.level_speed[self.level_manager.current_level], self.obstacle_view,
+            out=np.zeros(OBS_SIZE, dtype=np.float32))
 
-        obstacles_ahead = sorted(
-            [o for o in self.obstacles if o.position[2] > self.player.z],
-            key=lambda o: o.position[2]
-        )
-
-        if len(obstacles_ahead) > 0:
-            o1 = obstacles_ahead[0]
-            obs[3] = o1.position[2] - self.player.z
-            obs[4] = self.lanes.index(o1.position[0]) if o1.position[0] in self.lanes else -1
-            obs[5] = o1.scale[1]
-        else:
-            obs[3:6] = [100, -1, 0]
-
-        if len(obstacles_ahead) > 1:
-            o2 = obstacles_ahead[1]
-            obs[6] = o2.position[2] - self.player.z
-            obs[7] = self.lanes.index(o2.position[0]) if o2.position[0] in self.lanes else -1
-            obs[8] = o2.scale[1]
-        else:
-            obs[6:9] = [100, -1, 0]
-
-        obs[9] = self.base_speed * self.level_speed[self.level_manager.current_level]
-        
-        return obs
-        
     def render(self, mode='human'):
         pass
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Observation normalization without SB3 or gymnasium.
+
+`export` reads the observation stats (mean, var, clip, epsilon) out of a pickled
+VecNormalize and writes them to a small .npz or .json file. ObsNormalizer applies
+them exactly like VecNormalize.normalize_obs, so the game does not need to build
+an env just to load two arrays.
+
+    python src/rl/normalization.py src/rl/models/vec_normalize.pkl src/rl/models/vec_normalize.npz
+"""
+
+import argparse
+import json
+import pickle
+import numpy as np
+from pathlib import Path
+
+
+class ObsNormalizer:
+    def __init__(self, mean, var, clip_obs=10.0, epsilon=1e-8, norm_obs=True):
+        # VecNormalize keeps its running stats in float64, keep them so results are identical
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.var = np.asarray(var, dtype=np.float64)
+        self.clip_obs = float(clip_obs)
+        self.epsilon = float(epsilon)
+        self.norm_obs = bool(norm_obs)
+        self._std = np.sqrt(self.var + self.epsilon)
+
+    @classmethod
+    def load(cls, path):
+        """Load stats written by export, .json or .npz by extension"""
+        if str(path).endswith(".json"):
+            with open(path) as f:
+                return cls(**json.load(f))
+        data = np.load(path)
+        return cls(data["mean"], data["var"], float(data["clip_obs"]), float(data["epsilon"]), bool(data["norm_obs"]))
+
+    def normalize_obs(self, observation):
+        """Same result as VecNormalize.normalize_obs with training off"""
+        if not self.norm_obs:
+            return np.asarray(observation, dtype=np.float32)
+        return np.clip((observation - self.mean) / self._std, -self.clip_obs, self.clip_obs).astype(np.float32)
+
+
+def stats_from_pickle(stats_path):
+    """The observation stats stored in a VecNormalize pickle (needs SB3 to unpickle)"""
+    with open(stats_path, "rb") as f:
+        vec_normalize = pickle.load(f)
+    return {
+        "mean": vec_normalize.obs_rms.mean,
+        "var": vec_normalize.obs_rms.var,
+        "clip_obs": float(vec_normalize.clip_obs),
+        "epsilon": float(vec_normalize.epsilon),
+        "norm_obs": bool(vec_normalize.norm_obs),
+    }
+
+
+def export(stats_path, out_path):
+    """Write the observation stats of a VecNormalize pickle to out_path (.npz or .json)"""
+    stats = stats_from_pickle(stats_path)
+    if str(out_path).endswith(".json"):
+        stats["mean"] = stats["mean"].tolist()
+        stats["var"] = stats["var"].tolist()
+        with open(out_path, "w") as f:
+            json.dump(stats, f, indent=2)
+    else:
+        np.savez(out_path, **stats)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export VecNormalize observation stats")
+    parser.add_argument("stats", help="VecNormalize .pkl")
+    parser.add_argument("output", nargs="?", help="where to write the stats, .npz or .json (default: next to stats)")
+    args = parser.parse_args()
+
+    output = args.output or str(Path(args.stats).with_suffix(".npz"))
+    stats = export(args.stats, output)
+
+    # the exported stats have to normalize exactly like the pickle does
+    rng = np.random.default_rng(0)
+    observations = rng.normal(stats["mean"], np.sqrt(stats["var"]) * 3, (10_000, len(stats["mean"])))
+    with open(args.stats, "rb") as f:
+        expected = pickle.load(f).normalize_obs(observations)
+    actual = ObsNormalizer.load(output).normalize_obs(observations)
+    print(f"Exported {args.stats} to {output}, max difference {np.abs(expected - actual).max()}")
+
+
+if __name__ == "__main__":
+    main()
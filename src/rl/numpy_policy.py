@@ -0,0 +1,147 @@
+"""
+Torch-free inference for the trained PPO policy.
+
+`export` writes the actor part of an SB3 MlpPolicy (policy MLP + action head) to an
+.npz file, optionally with float16 or int8 (per-row scaled) weights for a smaller
+file. NumpyPolicy runs the deterministic forward pass with NumPy only, so the game
+does not need torch to let the AI play.
+
+    python src/rl/numpy_policy.py src/rl/models/best/best_model.zip src/rl/models/best/best_policy.npz
+
+Exporting checks that NumpyPolicy picks the same actions as SB3's deterministic
+predict on EyeBallEnv rollouts and on random observations.
+"""
+
+import sys
+import argparse
+import numpy as np
+from pathlib import Path
+
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0),
+}
+
+
+class NumpyPolicy:
+    def __init__(self, weights, biases, activation="tanh"):
+        self.weights = weights    # one (out, in) matrix per layer, last one is the action head
+        self.biases = biases
+        self.activation = ACTIVATIONS[activation]
+        # transposed once, so the forward pass is x @ W
+        self._weights_t = [np.ascontiguousarray(w.T) for w in weights]
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        n_layers = int(data["n_layers"])
+        weights, biases = [], []
+        for i in range(n_layers):
+            weight = data[f"w{i}"]
+            if weight.dtype == np.int8:
+                weight = weight.astype(np.float32) * data[f"w{i}_scale"][:, None]
+            weights.append(weight.astype(np.float32))
+            biases.append(data[f"b{i}"].astype(np.float32))
+        return cls(weights, biases, str(data["activation"]))
+
+    def logits(self, observation):
+        x = np.asarray(observation, dtype=np.float32).reshape(-1, self._weights_t[0].shape[0])
+        for weight_t, bias in zip(self._weights_t[:-1], self.biases[:-1]):
+            x = self.activation(x @ weight_t + bias)
+        return x @ self._weights_t[-1] + self.biases[-1]
+
+    def predict(self, observation, deterministic=True):
+        """Same call signature as PPO.predict, always deterministic (argmax)"""
+        return np.argmax(self.logits(observation), axis=1), None
+
+
+def export(model_path, out_path, precision="float32"):
+    """Write the actor weights of an SB3 PPO MlpPolicy to out_path"""
+    import torch
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    policy = model.policy
+    layers = [m for m in policy.mlp_extractor.policy_net if isinstance(m, torch.nn.Linear)] + [policy.action_net]
+    activation = policy.activation_fn.__name__.lower()
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation {policy.activation_fn}")
+
+    arrays = {"n_layers": len(layers), "activation": activation}
+    for i, layer in enumerate(layers):
+        weight = layer.weight.detach().numpy().astype(np.float32)
+        if precision == "int8":
+            scale = np.abs(weight).max(axis=1) / 127
+            scale[scale == 0] = 1
+            arrays[f"w{i}"] = np.round(weight / scale[:, None]).astype(np.int8)
+            arrays[f"w{i}_scale"] = scale.astype(np.float32)
+        else:
+            arrays[f"w{i}"] = weight.astype(precision)
+        arrays[f"b{i}"] = layer.bias.detach().numpy().astype(np.float32)
+
+    np.savez(out_path, **arrays)
+    return model
+
+
+def verify(model, numpy_policy, stats_path=None, n_steps=20_000, n_random=20_000, seed=0):
+    """Fraction of observations where NumpyPolicy and SB3 pick the same action"""
+    parent_dir = str(Path(__file__).parent.absolute())
+    if parent_dir not in sys.path:
+        sys.path.append(parent_dir)
+    from eyeball_env import EyeBallEnv
+
+    stats = None
+    if stats_path:
+        from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+        stats = VecNormalize.load(stats_path, DummyVecEnv([lambda: EyeBallEnv(headless=True)]))
+
+    # observations the policy actually sees while playing
+    env = EyeBallEnv(headless=True)
+    obs, _ = env.reset(seed=seed)
+    observations = []
+    for _ in range(n_steps):
+        model_obs = stats.normalize_obs(obs.reshape(1, -1)) if stats else obs.reshape(1, -1)
+        observations.append(model_obs[0])
+        action, _ = model.predict(model_obs, deterministic=True)
+        obs, _, done, _, _ = env.step(int(action[0]))
+        if done:
+            obs, _ = env.reset()
+
+    rng = np.random.default_rng(seed)
+    observations = np.concatenate([
+        np.array(observations, dtype=np.float32),
+        rng.normal(0, 2, (n_random, len(observations[0]))).astype(np.float32),
+    ])
+
+    expected, _ = model.predict(observations, deterministic=True)
+    actual, _ = numpy_policy.predict(observations)
+    return float(np.mean(expected == actual)), len(observations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a PPO policy for torch-free inference")
+    parser.add_argument("model", help="SB3 PPO .zip")
+    parser.add_argument("output", help="where to write the .npz")
+    parser.add_argument("--precision", choices=["float32", "float16", "int8"], default="float32")
+    parser.add_argument("--stats", help="VecNormalize stats used to play verification episodes")
+    parser.add_argument("--verify-steps", type=int, default=20_000)
+    args = parser.parse_args()
+
+    stats = args.stats
+    if stats is None:
+        default_stats = Path(args.model).parent.parent / "vec_normalize.pkl"
+        stats = str(default_stats) if default_stats.exists() else None
+
+    model = export(args.model, args.output, args.precision)
+    agreement, n_checked = verify(model, NumpyPolicy.load(args.output), stats, args.verify_steps, args.verify_steps)
+    print(f"Exported {args.model} to {args.output} ({args.precision}), "
+          f"actions identical to SB3 on {agreement:.4%} of {n_checked} observations")
+
+    if args.precision == "float32" and agreement < 1:
+        print("Error: float32 export does not reproduce SB3's actions")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+The 10-dimensional observation the agent sees, shared by training and the game.
+
+ObservationBuilder writes the features into a (preallocated) buffer and reads the
+obstacles through a thin adapter, so the headless simulator's ObstacleStore and
+the game's list of Ursina entities produce exactly the same observation:
+- Player lane index (0, 1, 2)
+- Player height
+- Player Y velocity (for jumping)
+- Distance to the nearest obstacle ahead
+- Lane index of the nearest obstacle ahead
+- Height of the nearest obstacle ahead
+- Distance to the second nearest obstacle ahead
+- Lane index of the second nearest obstacle ahead
+- Height of the second nearest obstacle ahead
+- Current game speed
+
+Obstacles only ever spawn ahead of the player, so both sources are in z order and
+the adapters keep a cursor on the first obstacle ahead instead of filtering and
+sorting all obstacles for every observation.
+"""
+
+import numpy as np
+
+OBS_SIZE = 10
+NO_OBSTACLE = (100, -1, 0)  # distance, lane, height when there is no obstacle ahead
+
+
+class StoreObstacles:
+    """Adapter for the headless simulator's ObstacleStore / CollisionIndex"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def advance(self, player_z):
+        return self.store.advance(player_z)
+
+    def end(self):
+        return self.store.tail
+
+    def obstacle(self, index):
+        store = self.store
+        slot = store.slot(index)
+        return store.x[slot], store.z[slot], store.height[slot]
+
+
+class EntityObstacles:
+    """Adapter for the game's list of obstacle entities (x, z and scale), in spawn order"""
+
+    def __init__(self, obstacles=None):
+        self.obstacles = obstacles if obstacles is not None else []
+        self.cursor = 0
+
+    def advance(self, player_z):
+        """Index of the first obstacle with z > player_z"""
+        obstacles = self.obstacles
+        cursor = min(self.cursor, len(obstacles))
+        # obstacles behind the player get removed from the front of the list, which moves the cursor back
+        while cursor > 0 and obstacles[cursor - 1].z > player_z:
+            cursor -= 1
+        while cursor < len(obstacles) and obstacles[cursor].z <= player_z:
+            cursor += 1
+        self.cursor = cursor
+        return cursor
+
+    def end(self):
+        return len(self.obstacles)
+
+    def obstacle(self, index):
+        obstacle = self.obstacles[index]
+        return obstacle.x, obstacle.z, obstacle.scale[1]
+
+
+class ObservationBuilder:
+    def __init__(self, lanes):
+        self.lane_lookup = {lane: idx for idx, lane in enumerate(lanes)}
+        self.buffer = np.zeros(OBS_SIZE, dtype=np.float32)
+
+    def build(self, lane_index, y, y_velocity, player_z, speed, obstacles, out=None):
+        """
+        Write the observation into out (default: this builder's buffer, overwritten by the next call).
+        obstacles: StoreObstacles or EntityObstacles
+        """
+        obs = self.buffer if out is None else out
+        obs[0] = lane_index
+        obs[1] = y
+        obs[2] = y_velocity
+
+        first = obstacles.advance(player_z)
+        end = obstacles.end()
+        for offset, column in ((0, 3), (1, 6)):
+            if first + offset < end:
+                x, z, height = obstacles.obstacle(first + offset)
+                obs[column] = z - player_z
+                obs[column + 1] = self.lane_lookup.get(x, -1)
+                obs[column + 2] = height
+            else:
+                obs[column:column + 3] = NO_OBSTACLE
+
+        obs[9] = speed
+        return obs
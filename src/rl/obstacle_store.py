@@ -0,0 +1,83 @@
+"""
+Compact obstacle storage for the headless simulator.
+
+Obstacles are kept in preallocated NumPy columns in spawn order. Spawning only
+ever happens ahead of the player, so spawn order is also z order, which lets
+expiry and the "next obstacle ahead" lookup work with plain moving indices
+instead of filtering or sorting.
+"""
+
+import numpy as np
+
+
+class ObstacleStore:
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self._allocate(capacity)
+        self.max_depth = 0.0
+        self.clear()
+
+    def _allocate(self, capacity):
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.z = np.zeros(capacity)
+        self.width = np.zeros(capacity)
+        self.height = np.zeros(capacity)
+        self.depth = np.zeros(capacity)
+
+    def clear(self):
+        # head, tail and cursor are absolute indices, slot = index % capacity
+        self.head = 0    # oldest live obstacle
+        self.tail = 0    # where the next obstacle goes
+        self.cursor = 0  # first obstacle ahead of the player
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def append(self, obstacle):
+        """Add an obstacle with position (x, y, z) and scale (width, height, depth)"""
+        position, scale = obstacle.position, obstacle.scale
+        self.push(position[0], position[1], position[2], scale[0], scale[1], scale[2])
+
+    def push(self, x, y, z, width, height, depth):
+        if len(self) == self.capacity:
+            self._grow()
+
+        slot = self.tail % self.capacity
+        self.x[slot] = x
+        self.y[slot] = y
+        self.z[slot] = z
+        self.width[slot] = width
+        self.height[slot] = height
+        self.depth[slot] = depth
+        self.tail += 1
+
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _grow(self):
+        old = [self.slot(i) for i in range(self.head, self.tail)]
+        columns = (self.x, self.y, self.z, self.width, self.height, self.depth)
+
+        self.capacity *= 2
+        self._allocate(self.capacity)
+        for new, column in zip((self.x, self.y, self.z, self.width, self.height, self.depth), columns):
+            new[[i % self.capacity for i in range(self.head, self.tail)]] = column[old]
+
+    def slot(self, index):
+        return index % self.capacity
+
+    def expire(self, min_z):
+        """Drop obstacles from the front that are at or behind min_z"""
+        while self.head < self.tail and self.z[self.head % self.capacity] <= min_z:
+            self.head += 1
+        if self.cursor < self.head:
+            self.cursor = self.head
+
+    def advance(self, player_z):
+        """Move the cursor to the first obstacle with z > player_z and return it"""
+        if self.cursor < self.head:
+            self.cursor = self.head
+        while self.cursor < self.tail and self.z[self.cursor % self.capacity] <= player_z:
+            self.cursor += 1
+        return self.cursor
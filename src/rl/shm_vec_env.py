@@ -0,0 +1,197 @@
+"""
+Multi-process vectorized env with shared-memory results.
+
+Each worker process hosts `envs_per_worker` envs and steps them in a loop. Actions,
+observations, rewards and dones live in one shared-memory NumPy block, so workers
+write their results in place and the pipes only carry tiny command/ack messages
+instead of pickled arrays. Env infos are only forwarded for envs that finished
+their episode (EyeBallEnv reports the crash and the final score there), so the
+step ack stays empty on most steps.
+"""
+
+import multiprocessing as mp
+import numpy as np
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+
+def _shared_array(ctx, shape, dtype):
+    dtype = np.dtype(dtype)
+    raw = ctx.RawArray('b', max(1, int(np.prod(shape)) * dtype.itemsize))
+    return raw, (shape, dtype.str)
+
+
+def _as_array(raw, spec):
+    shape, dtype = spec
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _worker(remote, parent_remote, env_fn_wrapper, start, count, buffers):
+    parent_remote.close()
+    envs = [env_fn_wrapper.var() for _ in range(count)]
+    obs, actions, rewards, dones, truncated, terminal_obs = [_as_array(raw, spec) for raw, spec in buffers]
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                done_infos = None  # {env index: info} of the envs that finished
+                for i, env in enumerate(envs):
+                    idx = start + i
+                    observation, reward, terminated, trunc, info = env.step(actions[idx])
+                    done = terminated or trunc
+                    if done:
+                        terminal_obs[idx] = observation
+                        if info:
+                            done_infos = done_infos or {}
+                            done_infos[idx] = info
+                        observation, _ = env.reset()
+                    obs[idx] = observation
+                    rewards[idx] = reward
+                    dones[idx] = done
+                    truncated[idx] = trunc and not terminated
+                remote.send(done_infos)
+            elif cmd == "reset":
+                seeds, options = data
+                for i, env in enumerate(envs):
+                    maybe_options = {"options": options[i]} if options[i] else {}
+                    obs[start + i], _ = env.reset(seed=seeds[i], **maybe_options)
+                remote.send(None)
+            elif cmd == "get_attr":
+                name, local_indices = data
+                remote.send([getattr(envs[i], name) for i in local_indices])
+            elif cmd == "set_attr":
+                name, value, local_indices = data
+                for i in local_indices:
+                    setattr(envs[i], name, value)
+                remote.send(None)
+            elif cmd == "env_method":
+                name, args, kwargs, local_indices = data
+                remote.send([getattr(envs[i], name)(*args, **kwargs) for i in local_indices])
+            elif cmd == "close":
+                break
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for env in envs:
+            env.close()
+        remote.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    def __init__(self, env_fn, n_workers=4, envs_per_worker=1, start_method=None):
+        self.n_workers = n_workers
+        self.envs_per_worker = envs_per_worker
+        self.waiting = False
+        self.closed = False
+        n_envs = n_workers * envs_per_worker
+
+        # spaces are read from a throwaway env in this process
+        env = env_fn()
+        observation_space, action_space = env.observation_space, env.action_space
+        env.close()
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        obs_shape = (n_envs,) + observation_space.shape
+        action_shape = (n_envs,) + action_space.shape
+        buffers = [
+            _shared_array(ctx, obs_shape, observation_space.dtype),   # obs
+            _shared_array(ctx, action_shape, action_space.dtype),     # actions
+            _shared_array(ctx, (n_envs,), np.float32),                # rewards
+            _shared_array(ctx, (n_envs,), np.bool_),                  # dones
+            _shared_array(ctx, (n_envs,), np.bool_),                  # truncated
+            _shared_array(ctx, obs_shape, observation_space.dtype),   # terminal obs
+        ]
+        (self.buf_obs, self.buf_actions, self.buf_rews,
+         self.buf_dones, self.buf_truncated, self.buf_terminal_obs) = [_as_array(raw, spec) for raw, spec in buffers]
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_workers)])
+        self.processes = []
+        for worker_idx, (work_remote, remote) in enumerate(zip(self.work_remotes, self.remotes)):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn),
+                    worker_idx * envs_per_worker, envs_per_worker, buffers)
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        super().__init__(n_envs, observation_space, action_space)
+
+    def step_async(self, actions):
+        self.buf_actions[:] = np.asarray(actions).reshape(self.buf_actions.shape)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        done_infos = {}
+        for remote in self.remotes:
+            done_infos.update(remote.recv() or {})
+        self.waiting = False
+
+        infos = [{"TimeLimit.truncated": bool(trunc)} for trunc in self.buf_truncated]
+        for env_idx, info in done_infos.items():
+            infos[env_idx].update(info)
+        for env_idx in np.flatnonzero(self.buf_dones):
+            infos[env_idx]["terminal_observation"] = self.buf_terminal_obs[env_idx].copy()
+        return self.buf_obs.copy(), self.buf_rews.copy(), self.buf_dones.copy(), infos
+
+    def reset(self):
+        for worker_idx, remote in enumerate(self.remotes):
+            start = worker_idx * self.envs_per_worker
+            end = start + self.envs_per_worker
+            remote.send(("reset", (self._seeds[start:end], self._options[start:end])))
+        for remote in self.remotes:
+            remote.recv()
+        # Seeds and options are only used once
+        self._reset_seeds()
+        self._reset_options()
+        return self.buf_obs.copy()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def _worker_indices(self, indices):
+        """Group global env indices by worker as {worker_idx: [local indices]}"""
+        grouped = {}
+        for idx in self._get_indices(indices):
+            grouped.setdefault(idx // self.envs_per_worker, []).append(idx % self.envs_per_worker)
+        return grouped
+
+    def _call(self, cmd, make_data, indices):
+        grouped = self._worker_indices(indices)
+        for worker_idx, local_indices in grouped.items():
+            self.remotes[worker_idx].send((cmd, make_data(local_indices)))
+        return [self.remotes[worker_idx].recv() for worker_idx in grouped]
+
+    def get_attr(self, attr_name, indices=None):
+        results = self._call("get_attr", lambda local: (attr_name, local), indices)
+        return [value for values in results for value in values]
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._call("set_attr", lambda local: (attr_name, value, local), indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        results = self._call("env_method", lambda local: (method_name, method_args, method_kwargs, local), indices)
+        return [value for values in results for value in values]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        # envs are used as returned by env_fn, any monitoring happens in a VecMonitor on top
+        return [False for _ in self._get_indices(indices)]
+
+    def get_images(self):
+        return [None for _ in range(self.num_envs)]
@@ -0,0 +1,202 @@
+"""
+Hyperparameter sweeps over train_agent configs, run in parallel in a process pool.
+
+A sweep file is JSON like:
+
+    {
+        "name": "lr_batch",
+        "base_config": "configs/default.json",
+        "method": "grid",                  # or "random" with "n_trials"
+        "params": {
+            "ppo.learning_rate": [3e-4, 1e-3],
+            "ppo.batch_size": [64, 128, 256]
+        },
+        "overrides": {"total_timesteps": 300000},
+        "max_parallel": 4,                 # trials running at the same time
+        "cpus_per_trial": 8,               # cores each trial is pinned to
+        "median_stop_min_evals": 3         # stop trials below the median of the others
+    }
+
+Params of a random sweep are either a list to sample from or {"low": a, "high": b, "log": true}
+for a (log-)uniform float. Each trial trains in sweeps/<name>/trial_<i> and the
+summary of all trials is written to sweeps/<name>/results.json.
+"""
+
+import sys
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+parent_dir = str(Path(__file__).parent.absolute())
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from stable_baselines3.common.callbacks import StopTrainingOnNoModelImprovement
+from train_agent import load_config, merge_config, resolve_path, train
+
+
+class MedianStoppingCallback(StopTrainingOnNoModelImprovement):
+    """
+    Stops a trial whose best eval reward is below the median of the other trials' best
+    at the same number of evaluations. Trials share their eval history through
+    evals.json files in the sweep directory.
+    Also applies the usual no-improvement patience if one is given.
+    """
+
+    def __init__(self, sweep_dir, trial_name, min_evals=3, patience=None, verbose=1):
+        super().__init__(patience if patience else 10**9, min_evals, verbose)
+        self.sweep_dir = sweep_dir
+        self.trial_name = trial_name
+        self.history = []
+
+    def _on_step(self):
+        continue_training = super()._on_step()
+
+        self.history.append(float(self.parent.best_mean_reward))
+        with open(f"{self.sweep_dir}/{self.trial_name}/evals.json", "w") as f:
+            json.dump(self.history, f)
+
+        n_evals = len(self.history)
+        if n_evals < self.min_evals:
+            return continue_training
+
+        others = []
+        for trial in os.listdir(self.sweep_dir):
+            path = f"{self.sweep_dir}/{trial}/evals.json"
+            if trial == self.trial_name or not os.path.exists(path):
+                continue
+            try:
+                with open(path) as f:
+                    history = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                continue  # being written right now
+            if len(history) >= n_evals:
+                others.append(history[n_evals - 1])
+
+        if others and self.history[-1] < np.median(others):
+            if self.verbose >= 1:
+                print(f"Stopping {self.trial_name}: best reward {self.history[-1]:.2f} below median "
+                      f"{np.median(others):.2f} of {len(others)} other trials after {n_evals} evaluations")
+            return False
+        return continue_training
+
+
+def set_by_path(config, dotted_key, value):
+    keys = dotted_key.split(".")
+    for key in keys[:-1]:
+        config = config.setdefault(key, {})
+    config[keys[-1]] = value
+
+
+def grid_trials(params):
+    keys = list(params)
+    return [dict(zip(keys, values)) for values in itertools.product(*(params[key] for key in keys))]
+
+
+def random_trials(params, n_trials, seed=None):
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(n_trials):
+        trial = {}
+        for key, space in params.items():
+            if isinstance(space, dict):
+                low, high = space["low"], space["high"]
+                if space.get("log"):
+                    trial[key] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+                else:
+                    trial[key] = float(rng.uniform(low, high))
+            else:
+                trial[key] = space[rng.integers(len(space))]
+        trials.append(trial)
+    return trials
+
+
+def _pin_worker(cpu_sets):
+    """Pool initializer, pins each pool process to its own set of cores (Linux only)"""
+    cpus = cpu_sets.get()
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def run_trial(config, sweep_dir, trial_name, median_stop_min_evals=None):
+    callback = None
+    if median_stop_min_evals:
+        callback = MedianStoppingCallback(sweep_dir, trial_name, median_stop_min_evals,
+                                          config["eval"].get("patience"))
+    try:
+        return dict(train(config, callback_after_eval=callback), status="ok")
+    except Exception as e:
+        return {"status": "failed", "error": repr(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a hyperparameter sweep of the EyeBall PPO agent")
+    parser.add_argument("sweep", help="sweep JSON file")
+    args = parser.parse_args()
+
+    with open(args.sweep) as f:
+        sweep = json.load(f)
+
+    base = load_config(resolve_path(sweep["base_config"]) if sweep.get("base_config") else None)
+    base = merge_config(base, sweep.get("overrides", {}))
+
+    if sweep.get("method", "grid") == "grid":
+        trials = grid_trials(sweep["params"])
+    else:
+        trials = random_trials(sweep["params"], sweep["n_trials"], sweep.get("seed"))
+
+    sweep_dir = resolve_path(f"sweeps/{sweep['name']}")
+    os.makedirs(sweep_dir, exist_ok=True)
+
+    max_parallel = sweep.get("max_parallel", 1)
+    cpus_per_trial = sweep.get("cpus_per_trial") or max(1, (os.cpu_count() or 1) // max_parallel)
+
+    configs = {}
+    for idx, params in enumerate(trials):
+        trial_name = f"trial_{idx:03d}"
+        config = merge_config(base, {
+            "cpus": cpus_per_trial,
+            "paths": {"models_dir": f"{sweep_dir}/{trial_name}/models", "logs_dir": f"{sweep_dir}/{trial_name}/logs"},
+        })
+        for key, value in params.items():
+            set_by_path(config, key, value)
+        # env worker processes share the trial's cores
+        if config["env"]["n_workers"] > cpus_per_trial:
+            config["env"]["n_workers"] = cpus_per_trial
+        os.makedirs(f"{sweep_dir}/{trial_name}", exist_ok=True)
+        configs[trial_name] = (params, config)
+
+    # one disjoint core set per pool process
+    ctx = mp.get_context("spawn")
+    cpu_sets = ctx.Queue()
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    for slot in range(max_parallel):
+        cpu_sets.put(set(available[slot * cpus_per_trial:(slot + 1) * cpus_per_trial]))
+
+    results = {}
+    with ProcessPoolExecutor(max_parallel, mp_context=ctx, initializer=_pin_worker, initargs=(cpu_sets,)) as pool:
+        futures = {
+            pool.submit(run_trial, config, sweep_dir, trial_name, sweep.get("median_stop_min_evals")): trial_name
+            for trial_name, (_, config) in configs.items()
+        }
+        for future in as_completed(futures):
+            trial_name = futures[future]
+            results[trial_name] = dict(future.result(), params=configs[trial_name][0])
+            print(f"{trial_name} finished: {results[trial_name]}")
+
+            with open(f"{sweep_dir}/results.json", "w") as f:
+                json.dump(dict(sorted(results.items())), f, indent=2)
+
+    ranked = sorted((r for r in results.values() if r["status"] == "ok"),
+                    key=lambda r: r["best_mean_reward"], reverse=True)
+    if ranked:
+        print(f"Best trial: {ranked[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,213 @@
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
-from stable_baselines3.common.callbacks import EvalCallback, CheckpointCallback
-from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize, VecMonitor
+from stable_baselines3.common.callbacks import EvalCallback, CheckpointCallback, StopTrainingOnNoModelImprovement
 from eyeball_env import EyeBallEnv
+from batched_env import BatchedEyeBallEnv
+from shm_vec_env import SharedMemoryVecEnv
+from normalization import export as export_stats
 from pathlib import Path
+from functools import partial
+import argparse
+import copy
+import json
 import os
+import re
 
 
-def make_eyeball_env():
-    return EyeBallEnv(headless=True)
+parent_dir = str(Path(__file__).parent.absolute())
+default_config_path = f"{parent_dir}/configs/default.json"
+checkpoint_prefix = "eyeball_model"
 
 
-parent_dir = str(Path(__file__).parent.absolute())
-models_dir = f"{parent_dir}/models"
-logs_dir = f"{parent_dir}/logs"
-os.makedirs(models_dir, exist_ok=True)
-os.makedirs(logs_dir, exist_ok=True)
-
-# vectorization and normalization of the environment
-env = make_vec_env(make_eyeball_env, n_envs=4)  # nr parallel envs to train in
-env = VecNormalize(env, norm_obs=True, norm_reward=True)
-
-# callbacks for evaluation and checkpointing
-eval_env = make_vec_env(make_eyeball_env, n_envs=1)
-eval_env = VecNormalize(eval_env, norm_obs=True, norm_reward=True)
-
-eval_callback = EvalCallback(
-    eval_env,
-    best_model_save_path=f"{models_dir}/best",
-    log_path=logs_dir,
-    eval_freq=10000,
-    deterministic=True,
-    render=False
-)
-
-checkpoint_callback = CheckpointCallback(
-    save_freq=50000,
-    save_path=f"{models_dir}/checkpoints",
-    name_prefix="eyeball_model"
-)
-
-model = PPO(
-    "MlpPolicy",
-    env,
-    verbose=1,
-    learning_rate=1e-3,
-    n_steps=4096,
-    batch_size=128,
-    n_epochs=10,
-    gamma=0.99,
-    gae_lambda=0.95,
-    clip_range=0.2,
-    tensorboard_log=logs_dir
-)
-
-# train
-total_timesteps = 1_000_000
-model.learn(
-    total_timesteps=total_timesteps,
-    callback=[eval_callback, checkpoint_callback]
-)
-
-model.save(f"{models_dir}/eyeball_final_model")
-env.save(f"{models_dir}/vec_normalize.pkl")
-print("Training completed!")
\ No newline at end of file
+def make_eyeball_env(frame_skip=1, dt=0.1):
+    return EyeBallEnv(headless=True, frame_skip=frame_skip, dt=dt)
+
+
+def make_training_env(n_envs, use_batched_env=False, n_workers=0, envs_per_worker=1, frame_skip=1, dt=0.1):
+    """
+    Build the vectorized training env:
+    - n_workers > 0: n_workers processes with envs_per_worker envs each, results in shared memory
+    - use_batched_env: all n_envs stepped in one NumPy pass in this process
+    - otherwise: n_envs separate envs stepped one after another in this process
+    All are wrapped the same way, so VecNormalize stats can be synced between them.
+    """
+    env_fn = partial(make_eyeball_env, frame_skip=frame_skip, dt=dt)
+    if n_workers > 0:
+        return VecMonitor(SharedMemoryVecEnv(env_fn, n_workers, envs_per_worker))
+    if use_batched_env:
+        return VecMonitor(BatchedEyeBallEnv(n_envs=n_envs, frame_skip=frame_skip, dt=dt))
+    return VecMonitor(DummyVecEnv([env_fn for _ in range(n_envs)]))
+
+
+def merge_config(base, override):
+    """Recursively merge override into a copy of base"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config(path=None):
+    """Default config, with the settings of the config file at path on top"""
+    with open(default_config_path) as f:
+        config = json.load(f)
+    if path:
+        with open(path) as f:
+            config = merge_config(config, json.load(f))
+    return config
+
+
+def resolve_path(path):
+    """Config paths are relative to the rl directory"""
+    return path if os.path.isabs(path) else os.path.join(parent_dir, path)
+
+
+def latest_checkpoint(checkpoint_dir):
+    """(model_path, stats_path) of the checkpoint with the most steps, or None"""
+    pattern = re.compile(rf"{checkpoint_prefix}_(\d+)_steps\.zip$")
+    steps = []
+    if os.path.isdir(checkpoint_dir):
+        for name in os.listdir(checkpoint_dir):
+            match = pattern.match(name)
+            if match:
+                steps.append(int(match.group(1)))
+    if not steps:
+        return None
+
+    step = max(steps)
+    model_path = f"{checkpoint_dir}/{checkpoint_prefix}_{step}_steps.zip"
+    stats_path = f"{checkpoint_dir}/{checkpoint_prefix}_vecnormalize_{step}_steps.pkl"
+    return model_path, stats_path if os.path.exists(stats_path) else None
+
+
+def train(config, resume=False, callback_after_eval=None):
+    """
+    Train a PPO agent as described by config.
+    resume: continue from the latest checkpoint (model and VecNormalize stats) if there is one.
+    callback_after_eval: extra callback run after every evaluation, can stop training early.
+    Returns a summary of the run.
+    """
+    models_dir = resolve_path(config["paths"]["models_dir"])
+    logs_dir = resolve_path(config["paths"]["logs_dir"])
+    checkpoint_dir = f"{models_dir}/checkpoints"
+    os.makedirs(models_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    if config.get("cpus"):
+        import torch
+        torch.set_num_threads(config["cpus"])
+
+    # vectorization and normalization of the environment
+    env_config = config["env"]
+    env = make_training_env(env_config["n_envs"], env_config["batched"], env_config["n_workers"],
+                            env_config["envs_per_worker"], env_config["frame_skip"], env_config["dt"])
+    if config.get("seed") is not None:
+        env.seed(config["seed"])
+
+    checkpoint = latest_checkpoint(checkpoint_dir) if resume else None
+    if checkpoint and checkpoint[1]:
+        env = VecNormalize.load(checkpoint[1], env)
+        env.training = True
+    else:
+        env = VecNormalize(env, norm_obs=True, norm_reward=True)
+
+    # callbacks for evaluation and checkpointing
+    eval_config = config["eval"]
+    eval_env = make_training_env(1, frame_skip=env_config["frame_skip"], dt=env_config["dt"])
+    eval_env = VecNormalize(eval_env, norm_obs=True, norm_reward=True)
+
+    if callback_after_eval is None and eval_config.get("patience"):
+        callback_after_eval = StopTrainingOnNoModelImprovement(
+            eval_config["patience"], eval_config.get("min_evals", 0), verbose=1)
+
+    eval_callback = EvalCallback(
+        eval_env,
+        callback_after_eval=callback_after_eval,
+        best_model_save_path=f"{models_dir}/best",
+        log_path=logs_dir,
+        eval_freq=eval_config["eval_freq"],
+        n_eval_episodes=eval_config["n_eval_episodes"],
+        deterministic=True,
+        render=False
+    )
+
+    checkpoint_callback = CheckpointCallback(
+        save_freq=config["checkpoint_freq"],
+        save_path=checkpoint_dir,
+        name_prefix=checkpoint_prefix,
+        save_vecnormalize=True
+    )
+
+    if checkpoint:
+        print(f"Resuming from {checkpoint[0]}")
+        model = PPO.load(checkpoint[0], env=env, tensorboard_log=logs_dir)
+    else:
+        model = PPO(
+            "MlpPolicy",
+            env,
+            verbose=1,
+            seed=config.get("seed"),
+            tensorboard_log=logs_dir,
+            **config["ppo"]
+        )
+
+    # train
+    total_timesteps = config["total_timesteps"]
+    model.learn(
+        total_timesteps=max(0, total_timesteps - model.num_timesteps),
+        callback=[eval_callback, checkpoint_callback],
+        reset_num_timesteps=not checkpoint
+    )
+
+    model.save(f"{models_dir}/eyeball_final_model")
+    env.save(f"{models_dir}/vec_normalize.pkl")
+    export_stats(f"{models_dir}/vec_normalize.pkl", f"{models_dir}/vec_normalize.npz")
+    env.close()
+    eval_env.close()
+    print("Training completed!")
+
+    return {
+        "timesteps": model.num_timesteps,
+        "best_mean_reward": float(eval_callback.best_mean_reward),
+        "last_mean_reward": float(eval_callback.last_mean_reward),
+        "stopped_early": model.num_timesteps < total_timesteps,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the EyeBall PPO agent")
+    parser.add_argument("--config", help="JSON config file, overrides configs/default.json")
+    parser.add_argument("--resume", action="store_true", help="continue from the latest checkpoint")
+    parser.add_argument("--n-envs", type=int, help="nr parallel envs to train in, split evenly over --n-workers")
+    parser.add_argument("--batched", action="store_true", default=None,
+                        help="step all envs in one NumPy pass, cheap enough for 256+ envs")
+    parser.add_argument("--n-workers", type=int, help="worker processes stepping envs, 0 steps them in this process")
+    parser.add_argument("--envs-per-worker", type=int, help="envs hosted by each worker process")
+    parser.add_argument("--frame-skip", type=int, help="physics steps per agent decision")
+    parser.add_argument("--dt", type=float, help="physics time step in seconds")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    overrides = {"n_envs": args.n_envs, "batched": args.batched, "n_workers": args.n_workers,
+                 "envs_per_worker": args.envs_per_worker, "frame_skip": args.frame_skip, "dt": args.dt}
+    env_config = config["env"]
+    env_config.update({key: value for key, value in overrides.items() if value is not None})
+
+    # with worker processes the env count is n_workers * envs_per_worker, don't silently train on another count
+    if env_config["n_workers"] > 0:
+        if env_config["batched"]:
+            parser.error("--batched steps all envs in this process, it can't be combined with --n-workers")
+        if args.n_envs is not None:
+            if args.envs_per_worker is None:
+                if args.n_envs % env_config["n_workers"]:
+                    parser.error(f"--n-envs {args.n_envs} is not a multiple of --n-workers {env_config['n_workers']}")
+                env_config["envs_per_worker"] = args.n_envs // env_config["n_workers"]
+            elif args.n_envs != env_config["n_workers"] * args.envs_per_worker:
+                parser.error(f"--n-envs {args.n_envs} does not match --n-workers {env_config['n_workers']} "
+                             f"x --envs-per-worker {args.envs_per_worker}")
+        env_config["n_envs"] = env_config["n_workers"] * env_config["envs_per_worker"]
+
+    train(config, resume=args.resume)
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+
+class StartupOrchestrator:
+    """
+    Runs slow startup steps (model loading, camera and FaceMesh init) on background
+    threads while the scene is built on the main thread, and hands each result back
+    to the main thread through poll() once it is ready.
+    """
+
+    def __init__(self, started_at=None, max_workers=2):
+        self.started_at = started_at if started_at is not None else perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.timings = {}   # name -> seconds the step took
+        self.ready_at = {}  # name -> seconds after start the step was done
+        self.pending = {}   # name -> (future, on_ready, on_error)
+        self.reported = False
+
+    def submit(self, name, fn, on_ready=None, on_error=None):
+        """Run fn() in the background; on_ready(result) / on_error(exception) are called from poll()"""
+        def timed():
+            t0 = perf_counter()
+            try:
+                return fn()
+            finally:
+                self.timings[name] = perf_counter() - t0
+                self.ready_at[name] = perf_counter() - self.started_at
+
+        self.pending[name] = (self.executor.submit(timed), on_ready, on_error)
+
+    def mark(self, name, step_started_at):
+        """Record a step that ran on the main thread"""
+        self.timings[name] = perf_counter() - step_started_at
+        self.ready_at[name] = perf_counter() - self.started_at
+
+    def poll(self):
+        """Swap in finished components, call once per frame from the main thread"""
+        for name, (future, on_ready, on_error) in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[name]
+            error = future.exception()
+            if error is None:
+                if on_ready:
+                    on_ready(future.result())
+            else:
+                print(f"Startup step '{name}' failed: {error}")
+                if on_error:
+                    on_error(error)
+
+        if not self.pending and not self.reported:
+            self.reported = True
+            self.executor.shutdown(wait=False)
+            print(self.report())
+
+    def report(self):
+        steps = ", ".join(f"{name} {self.timings[name]:.2f}s (ready at {self.ready_at[name]:.2f}s)"
+                          for name in sorted(self.ready_at, key=self.ready_at.get))
+        return f"Startup timings: {steps}"